@@ -160,6 +160,13 @@ def cleanup_old_files(hours=24):
             except Exception as e:
                 logger.error(f"Error cleaning output directory {session_dir}: {e}")
     
+    # Prune converted MAS images on their own (longer) TTL; in-use ones are kept fresh
+    try:
+        from utils.mas_generator import prune_mas_image_cache
+        cleaned['mas_images'] = prune_mas_image_cache()
+    except Exception as e:
+        logger.error(f"Error pruning MAS image cache: {e}")
+    
     # Clean old flask session files
     session_dir = 'flask_session'
     if os.path.exists(session_dir):
@@ -3404,8 +3411,8 @@ def get_brand_models_api():
         enrich = request.args.get('enrich', 'false').lower() == 'true'
         if enrich and models:
             try:
-                from utils.product_enricher import ProductEnricher
-                enricher = ProductEnricher()
+                from utils.product_enricher import get_product_enricher
+                enricher = get_product_enricher()
                 logger.info(f"Enriching {len(models)} products for {brand}...")
                 models = enricher.enrich_product_selection_data(models, use_selenium=False)
                 logger.info(f"Enrichment complete for {brand}")
@@ -3437,8 +3444,8 @@ def enrich_products():
         if not products:
             return jsonify({'error': 'No products provided'}), 400
         
-        from utils.product_enricher import ProductEnricher
-        enricher = ProductEnricher()
+        from utils.product_enricher import get_product_enricher
+        enricher = get_product_enricher()
         
         logger.info(f"Enriching {len(products)} products...")
         enriched_products = enricher.enrich_product_selection_data(products, use_selenium)
@@ -3864,7 +3871,9 @@ def scrape_and_add_brand():
         elif scraping_method == 'requests' or scraping_method == 'universal':
             logger.info(f"🚀 Using Unified Scraper (Requests → Selenium fallback)")
             from utils.requests_brand_scraper import RequestsBrandScraper
-            scraper = RequestsBrandScraper(delay=0.5, fetch_descriptions=True)
+            # 'refresh' re-fetches pages the on-disk page cache still holds
+            scraper = RequestsBrandScraper(delay=0.5, fetch_descriptions=True,
+                                           refresh_cache=bool(data.get('refresh', False)))
             scraped_data = scraper.scrape_brand_website(
                 website=website,
                 brand_name=brand_name,
@@ -4081,8 +4090,12 @@ def _scrape_single_brand(brand_info):
                     logger.info(f"[Parallel] Using Architonic scraper for {brand_name}")
                     scraped_data = architonic_scraper.scrape_collection(website, brand_name)
                 else:
-                    # Try Requests scraper first
-                    requests_scraper = RequestsBrandScraper(delay=0.5, fetch_descriptions=True)
+                    # Try Requests scraper first; retries skip the page cache so they
+                    # don't just replay the pages of the failed attempt
+                    requests_scraper = RequestsBrandScraper(
+                        delay=0.5, fetch_descriptions=True,
+                        refresh_cache=bool(brand_info.get('refresh', False)) or retry_count > 1
+                    )
                     scraped_data = requests_scraper.scrape_brand_website(website, brand_name, limit=100)
                     
                     # Check if we need Selenium fallback
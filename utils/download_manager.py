@@ -1,25 +1,116 @@
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
 import pandas as pd
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils.dataframe import dataframe_to_rows
+from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.utils import get_column_letter
 from openpyxl.drawing.image import Image as XLImage
 from openpyxl.drawing.spreadsheet_drawing import OneCellAnchor, AnchorMarker, XDRPositiveSize2D
 from openpyxl.utils.units import pixels_to_EMU
+from PIL import Image as PIL_Image
 import shutil
+import tempfile
+import threading
+import traceback
 import zipfile
 import re
 import logging
 
+import xlsxwriter
+
+from utils.image_helper import download_image, get_brand_logo_url
+
 logger = logging.getLogger(__name__)
 
+# Optional SIMD-accelerated DEFLATE (zlib API compatible) for xlsx packaging
+try:
+    from zlib_ng import zlib_ng as fast_zlib
+    FAST_ZLIB_AVAILABLE = True
+except ImportError:
+    try:
+        from isal import isal_zlib as fast_zlib
+        FAST_ZLIB_AVAILABLE = True
+    except ImportError:
+        fast_zlib = None
+        FAST_ZLIB_AVAILABLE = False
+
+# xlsxwriter formats for the data-only workbooks (match the openpyxl header/title styles)
+XLSX_HEADER_FORMAT = {'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#667EEA', 'align': 'center', 'valign': 'vcenter'}
+XLSX_TITLE_FORMAT = {'bold': True, 'font_size': 16, 'font_color': '#FFFFFF', 'bg_color': '#764BA2', 'align': 'center', 'valign': 'vcenter'}
+
+# <img> tag or extracted image file reference inside a cell
+IMAGE_REFERENCE_RE = re.compile(r'<img|img_in_', re.IGNORECASE)
+
+# <img src="..."> value and extracted image file reference
+IMAGE_SRC_RE = re.compile(r'src=["\']([^"\']+)["\']')
+IMAGE_FILE_RE = re.compile(r'(imgs/img_in_[^"\s<>]+\.jpg)')
+
+# Column letters A..Z; offer sheets rarely go wider
+COLUMN_LETTERS = tuple(get_column_letter(i) for i in range(1, 27))
+
+# Markdown table separator line, e.g. |---|:---:|
+MARKDOWN_SEPARATOR_RE = re.compile(r'^[-|:\s]+$')
+
+class _NumericCharsTable(dict):
+    """str.translate table keeping only decimal digits, '.' and '-' (same as re.sub(r'[^\\d.-]', ''))"""
+    
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        value = None if not (char.isdecimal() or char in '.-') else codepoint
+        self[codepoint] = value
+        return value
+
+
+NUMERIC_CHARS = _NumericCharsTable()
+
+# Shared openpyxl style objects (immutable, safe to assign to many cells)
+HEADER_FILL = PatternFill(start_color='667EEA', end_color='667EEA', fill_type='solid')
+HEADER_FONT = Font(bold=True, color='FFFFFF')
+TITLE_FILL = PatternFill(start_color='764BA2', end_color='764BA2', fill_type='solid')
+TITLE_FONT = Font(bold=True, size=16, color='FFFFFF')
+CENTER_ALIGNMENT = Alignment(horizontal='center', vertical='center')
+SUMMARY_FONT = Font(bold=True)
+SUMMARY_ALIGNMENT = Alignment(horizontal='right')
+WRAP_ALIGNMENT = Alignment(wrap_text=True, vertical='center', horizontal='left')
+
+# zipfile.zlib is process-wide: the swap is counted so concurrent/nested
+# fast_deflate blocks patch it once and restore it when the last one exits
+_FAST_DEFLATE_LOCK = threading.Lock()
+_fast_deflate_users = 0
+_original_zipfile_zlib = zipfile.zlib
+
+
+@contextmanager
+def fast_deflate():
+    """Route zipfile's DEFLATE through zlib-ng/ISA-L while the block runs (no-op if unavailable)"""
+    global _fast_deflate_users
+    if not FAST_ZLIB_AVAILABLE:
+        yield
+        return
+    
+    with _FAST_DEFLATE_LOCK:
+        if _fast_deflate_users == 0:
+            zipfile.zlib = fast_zlib
+        _fast_deflate_users += 1
+    try:
+        yield
+    finally:
+        with _FAST_DEFLATE_LOCK:
+            _fast_deflate_users -= 1
+            if _fast_deflate_users == 0:
+                zipfile.zlib = _original_zipfile_zlib
+
+
 class DownloadManager:
     """Manage downloads of all generated artifacts"""
     
     def __init__(self):
         self.supported_formats = ['pdf', 'excel', 'xlsx', 'xls', 'pptx', 'zip']
+        # (session_id, file_id, src) -> resolved image path, saves a stat per repeated image
+        self._img_path_cache = {}
     
     def get_logo_path(self):
         """Return the best available logo path"""
@@ -304,39 +395,36 @@ class DownloadManager:
         return zip_filename
     
     def create_extraction_excel(self, extraction_result, output_dir, file_id):
-        """Create Excel file from extraction result"""
+        """Create Excel file from extraction result (pure data, written with xlsxwriter)"""
         filename = os.path.join(output_dir, f'extraction_{file_id}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx')
         
-        wb = Workbook()
-        
         # Logo removed from Excel exports per user request
-        wb.remove(wb.active)  # Remove default sheet
-        
-        # Process each page
-        for idx, layout_result in enumerate(extraction_result.get('layoutParsingResults', [])):
-            markdown_text = layout_result.get('markdown', {}).get('text', '')
-            
-            # Extract tables
-            tables = self.parse_markdown_tables(markdown_text)
+        with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
+            header_fmt = writer.book.add_format(XLSX_HEADER_FORMAT)
             
-            for table_idx, table in enumerate(tables):
-                sheet_name = f'Page{idx+1}_Table{table_idx+1}'[:31]  # Excel sheet name limit
-                ws = wb.create_sheet(title=sheet_name)
+            # Process each page
+            for idx, layout_result in enumerate(extraction_result.get('layoutParsingResults', [])):
+                markdown_text = layout_result.get('markdown', {}).get('text', '')
                 
-                # Add headers
-                if table['headers']:
-                    ws.append(table['headers'])
-                    self.style_header_row(ws, 1)
+                # Extract tables
+                tables = self.parse_markdown_tables(markdown_text)
                 
-                # Add data rows
-                for row in table['rows']:
-                    row_data = [row.get(h, '') for h in table['headers']]
-                    ws.append(row_data)
-                
-                # Auto-adjust column widths
-                self.auto_adjust_columns(ws)
+                for table_idx, table in enumerate(tables):
+                    sheet_name = f'Page{idx+1}_Table{table_idx+1}'[:31]  # Excel sheet name limit
+                    headers = table['headers']
+                    rows = table['rows']
+                    
+                    # Data rows below a manually styled header row
+                    pd.DataFrame(rows, columns=headers).to_excel(
+                        writer, sheet_name=sheet_name, index=False, header=False, startrow=1
+                    )
+                    ws = writer.sheets[sheet_name]
+                    ws.write_row(0, 0, headers, header_fmt)
+                    
+                    # Auto-adjust column widths
+                    for col, width in self._column_widths([headers] + rows).items():
+                        ws.set_column(col, col, width)
         
-        wb.save(filename)
         return filename
     
     def create_offer_excel(self, costed_data, output_dir, file_id, product_selections=None):
@@ -349,8 +437,27 @@ class DownloadManager:
         
         temp_files = []
         
+        # Longest value per written column (1-based), tracked as cells are set
+        # so column widths need no second pass over the sheet
+        col_lengths = {}
+        
+        def track(col_num, value):
+            if value:
+                length = len(str(value))
+                if length > col_lengths.get(col_num, 0):
+                    col_lengths[col_num] = length
+        
+        def append(values):
+            ws.append(values)
+            for col_num, value in enumerate(values, 1):
+                track(col_num, value)
+        
+        def set_cell(row_num, col_num, value):
+            ws.cell(row=row_num, column=col_num).value = value
+            track(col_num, value)
+        
         # Title
-        ws.append(['COMMERCIAL OFFER'])
+        append(['COMMERCIAL OFFER'])
         ws.merge_cells('A1:F1')
         self.style_title_row(ws, 1)
         
@@ -362,9 +469,16 @@ class DownloadManager:
         # Get session info for image paths
         session_id = costed_data.get('session_id', '')
         
+        # Brand name -> logo URL, shared by all tables of this offer
+        brand_logos = {}
+        # row_index -> selection (first one wins, matching the previous linear scan)
+        selections_by_row = {}
+        for selection in product_selections or []:
+            selections_by_row.setdefault(selection.get('row_index'), selection)
+        
         # Tables
         for table_idx, table in enumerate(costed_data['tables']):
-            ws.append([f'Item List {table_idx + 1}'])
+            append([f'Item List {table_idx + 1}'])
             ws.merge_cells(f'A{ws.max_row}:F{ws.max_row}')
             
             # Filter out Action and Product Selection columns from headers
@@ -372,7 +486,7 @@ class DownloadManager:
             
             # Headers
             header_row_num = ws.max_row + 1
-            ws.append(headers)
+            append(headers)
             self.style_header_row(ws, header_row_num)
             
             # Recalculate totals for all rows before exporting
@@ -411,141 +525,117 @@ class DownloadManager:
             if len(unique_rows) < len(table['rows']):
                 logger.info(f"Excel generation: Removed {len(table['rows']) - len(unique_rows)} duplicate rows")
             
-            # Data rows - exclude Action column and embed images
+            # Identify key columns (depends only on headers)
+            total_col_idx = -1
+            for i, h in enumerate(headers):
+                h_lower = h.lower()
+                if any(v in h_lower for v in ['total', 'amount']) and '_original' not in h_lower:
+                    total_col_idx = i + 1
+                    break
+            if total_col_idx == -1:
+                total_col_idx = 7 # Fallback
+            
+            image_cols = [any(v in h.lower() for v in ['image', 'img', 'picture', 'pic']) for h in headers]
+            
+            # Phase 1 (plan): build text cells, row heights and image placements
+            # for every row before touching the network or the worksheet
+            text_rows = []
+            row_heights = []
+            image_jobs = []  # (row_offset, col_idx, is_image_col, image_url, brand_logo_url)
             for row_idx, row in enumerate(unique_rows):
-                current_row_num = ws.max_row + 1
                 row_data = []
+                has_image_content = False
                 
                 for col_idx, h in enumerate(headers):
                     cell_value = row.get(h, '')
+                    is_image_col = image_cols[col_idx]
+                    has_image = self.contains_image(cell_value)
                     
-                    # Check if this cell contains an image
-                    if self.contains_image(cell_value):
-                        row_data.append('')  # Empty cell, image will be placed on top
+                    # Image cells stay empty, the image is placed on top
+                    if has_image:
+                        row_data.append('')
                     else:
                         # Strip HTML tags if any
-                        clean_value = re.sub(r'<[^>]+>', '', str(cell_value))
-                        row_data.append(clean_value)
-                
-                ws.append(row_data)
+                        row_data.append(re.sub(r'<[^>]+>', '', str(cell_value)))
+                    
+                    if not (is_image_col or has_image):
+                        continue
+                    has_image_content = True
+                    
+                    # Priority: get image_url from row data, then extracted path, then product_selections
+                    image_url = row.get('image_url') or self.extract_image_path(str(cell_value), session_id, file_id)
+                    brand_logo_url = row.get('brand_logo')
+                    
+                    # Fallback to product_selections if available (requested by user)
+                    if selections_by_row and (not image_url or not brand_logo_url):
+                        # Try to match by row index
+                        selection = selections_by_row.get(row_idx)
+                        if selection:
+                            if not image_url: image_url = selection.get('image_url')
+                            if not brand_logo_url: brand_logo_url = selection.get('brand_logo')
+                    
+                    # Final fallback for brand logo from brand name (resolved once per brand)
+                    if not brand_logo_url:
+                        brand = row.get('brand') or row.get('Brand')
+                        if brand:
+                            if brand not in brand_logos:
+                                try:
+                                    brand_logos[brand] = get_brand_logo_url(brand)
+                                except Exception:
+                                    brand_logos[brand] = None
+                            brand_logo_url = brand_logos[brand]
+                    
+                    image_jobs.append((row_idx, col_idx, is_image_col, image_url, brand_logo_url))
                 
-                # Set row height for images - taller if both logo and product image present
-                has_image_content = any(any(v in h.lower() for v in ['image', 'img', 'picture', 'pic']) or self.contains_image(row.get(h, '')) for h in headers)
+                text_rows.append(row_data)
+                # Taller rows if both logo and product image present
                 if has_image_content:
-                    if row.get('brand_logo'):
-                        ws.row_dimensions[current_row_num].height = 135
+                    row_heights.append(135 if row.get('brand_logo') else 100)
+                else:
+                    row_heights.append(None)
+            
+            # Phase 2 (fetch): download and convert every distinct image concurrently
+            prepared = self._prepare_excel_images(image_jobs, temp_files)
+            
+            # Phase 3 (emit): write all text rows, then anchor the images
+            first_row_num = ws.max_row + 1
+            for row_data, height in zip(text_rows, row_heights):
+                append(row_data)
+                if height:
+                    ws.row_dimensions[ws.max_row].height = height
+            
+            for row_offset, col_idx, is_image_col, image_url, brand_logo_url in image_jobs:
+                current_row_num = first_row_num + row_offset
+                logo_added = False
+                img_added = False
+                
+                # Process Brand Logo
+                if brand_logo_url:
+                    status, tmp_path = prepared.get((brand_logo_url, 'RGBA'), ('missing', None))
+                    if status == 'ok':
+                        self._anchor_image(ws, tmp_path, col_idx, current_row_num, 60, 40, 5)
+                        logo_added = True
+                        logger.info(f"Added brand logo for row {current_row_num}")
+                
+                # Process Product Image
+                if image_url:
+                    status, tmp_path = prepared.get((image_url, 'RGB'), ('missing', None))
+                    if status == 'ok':
+                        row_off = 50 if logo_added else 5
+                        self._anchor_image(ws, tmp_path, col_idx, current_row_num, 100, 100, row_off)
+                        img_added = True
+                        logger.info(f"Added product image for row {current_row_num}")
+                    elif status == 'error':
+                        if not logo_added:
+                            set_cell(current_row_num, col_idx + 1, "[Img Error]")
                     else:
-                        ws.row_dimensions[current_row_num].height = 100
+                        logger.warning(f"Product image path does not exist for row {current_row_num}: {tmp_path}")
+                        if is_image_col and not logo_added:
+                            set_cell(current_row_num, col_idx + 1, "[Missing]")
                 
-                # Identify key columns for this row
-                total_col_idx = -1
-                for i, h in enumerate(headers):
-                    h_lower = h.lower()
-                    if any(v in h_lower for v in ['total', 'amount']) and '_original' not in h_lower:
-                        total_col_idx = i + 1
-                        break
-                if total_col_idx == -1:
-                    total_col_idx = 7 # Fallback
-
-                # Embed images and brand logos
-                for col_idx, h in enumerate(headers):
-                    cell_value = str(row.get(h, ''))
-                    is_image_col = any(v in h.lower() for v in ['image', 'img', 'picture', 'pic'])
-                    
-                    if is_image_col or self.contains_image(cell_value):
-                        # Priority: get image_url from row data, then extracted path, then product_selections
-                        image_url = row.get('image_url') or self.extract_image_path(cell_value, session_id, file_id)
-                        brand_logo_url = row.get('brand_logo')
-                        
-                        # Fallback to product_selections if available (requested by user)
-                        if product_selections and (not image_url or not brand_logo_url):
-                            # Try to match by row index
-                            selection = next((p for p in product_selections if p.get('row_index') == row_idx), None)
-                            if selection:
-                                if not image_url: image_url = selection.get('image_url')
-                                if not brand_logo_url: brand_logo_url = selection.get('brand_logo')
-
-                        # Final fallback for brand logo from brand name
-                        if not brand_logo_url:
-                            brand = row.get('brand') or row.get('Brand')
-                            if brand:
-                                try:
-                                    from utils.image_helper import get_brand_logo_url
-                                    brand_logo_url = get_brand_logo_url(brand)
-                                except: pass
-
-                        logo_added = False
-                        img_added = False
-
-                        try:
-                            from utils.image_helper import download_image
-                            from PIL import Image as PIL_Image
-                            import tempfile
-                            import traceback
-                            
-                            # Process Brand Logo
-                            if brand_logo_url:
-                                cached_logo = download_image(brand_logo_url)
-                                if cached_logo and os.path.exists(cached_logo):
-                                    try:
-                                        # Use tempfile path to avoid 'fp' attribute error in openpyxl
-                                        with PIL_Image.open(cached_logo) as pil_img:
-                                            tmp = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-                                            pil_img.convert('RGBA').save(tmp.name, format='PNG')
-                                            tmp.close()
-                                            temp_files.append(tmp.name)
-                                            
-                                            logo_xl = XLImage(tmp.name)
-                                            logo_xl.width = 60
-                                            logo_xl.height = 40
-                                            
-                                            marker = AnchorMarker(col=col_idx, colOff=pixels_to_EMU(10), row=current_row_num-1, rowOff=pixels_to_EMU(5))
-                                            # XLImage from path should have _extent, but manual set is safer
-                                            ext = XDRPositiveSize2D(pixels_to_EMU(logo_xl.width), pixels_to_EMU(logo_xl.height))
-                                            logo_xl.anchor = OneCellAnchor(_from=marker, ext=ext)
-                                            ws.add_image(logo_xl)
-                                            logo_added = True
-                                            logger.info(f"Added brand logo for row {current_row_num}")
-                                    except Exception as e:
-                                        logger.warning(f"Error adding logo to Excel row {current_row_num}: {e}\n{traceback.format_exc()}")
-
-                            # Process Product Image
-                            if image_url:
-                                cached_img = download_image(image_url) if str(image_url).startswith('http') else image_url
-                                if cached_img and os.path.exists(str(cached_img)):
-                                    try:
-                                        with PIL_Image.open(str(cached_img)) as pil_img:
-                                            tmp = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-                                            pil_img.convert('RGB').save(tmp.name, format='PNG')
-                                            tmp.close()
-                                            temp_files.append(tmp.name)
-                                            
-                                            img_xl = XLImage(tmp.name)
-                                            img_xl.width = 100
-                                            img_xl.height = 100
-                                            
-                                            row_off = 50 if logo_added else 5
-                                            marker = AnchorMarker(col=col_idx, colOff=pixels_to_EMU(10), row=current_row_num-1, rowOff=pixels_to_EMU(row_off))
-                                            ext = XDRPositiveSize2D(pixels_to_EMU(img_xl.width), pixels_to_EMU(img_xl.height))
-                                            img_xl.anchor = OneCellAnchor(_from=marker, ext=ext)
-                                            ws.add_image(img_xl)
-                                            img_added = True
-                                            logger.info(f"Added product image for row {current_row_num}")
-                                    except Exception as e:
-                                        logger.warning(f"Error adding product image to Excel row {current_row_num}: {e}\n{traceback.format_exc()}")
-                                        if not logo_added:
-                                            ws.cell(row=current_row_num, column=col_idx + 1).value = "[Img Error]"
-                                else:
-                                    logger.warning(f"Product image path does not exist for row {current_row_num}: {cached_img}")
-                                    if is_image_col and not logo_added:
-                                        ws.cell(row=current_row_num, column=col_idx + 1).value = "[Missing]"
-
-                            # Cleanup cell text IF it's the dedicated image column
-                            if is_image_col and (logo_added or img_added):
-                                ws.cell(row=current_row_num, column=col_idx + 1).value = ""
-
-                        except Exception as e:
-                            logger.error(f"Excel image processing totally failed for row {current_row_num}: {e}\n{traceback.format_exc()}")
+                # Cleanup cell text IF it's the dedicated image column
+                if is_image_col and (logo_added or img_added):
+                    set_cell(current_row_num, col_idx + 1, "")
 
             # Update summary row logic to use identified total column
             final_summary_col = total_col_idx
@@ -559,36 +649,45 @@ class DownloadManager:
             
             # Add summary rows with proper formatting
             summary_row = ws.max_row + 2
-            ws.cell(row=summary_row, column=summary_label_col).value = 'Subtotal:'
-            ws.cell(row=summary_row, column=final_summary_col).value = subtotal
+            set_cell(summary_row, summary_label_col, 'Subtotal:')
+            set_cell(summary_row, final_summary_col, subtotal)
             
-            ws.cell(row=summary_row + 1, column=summary_label_col).value = 'VAT (15%):'
-            ws.cell(row=summary_row + 1, column=final_summary_col).value = vat
+            set_cell(summary_row + 1, summary_label_col, 'VAT (15%):')
+            set_cell(summary_row + 1, final_summary_col, vat)
             
-            ws.cell(row=summary_row + 2, column=summary_label_col).value = 'Grand Total:'
-            ws.cell(row=summary_row + 2, column=final_summary_col).value = grand_total
+            set_cell(summary_row + 2, summary_label_col, 'Grand Total:')
+            set_cell(summary_row + 2, final_summary_col, grand_total)
         
         # Style summary rows
         self.style_summary_rows(ws, summary_row, summary_row + 2)
         
         # Final column adjustments
-        # First auto-adjust everything
-        self.auto_adjust_columns(ws)
-        
-        # Then apply specific overrides for image and description columns
+        # Image and description columns get fixed widths, so collect them first
+        width_overrides = {}
         for table in costed_data['tables']:
             headers = [h for h in table['headers'] if h.lower() not in ['action', 'actions', 'product selection', 'productselection']]
             for col_idx, h in enumerate(headers):
-                col_letter = chr(65 + col_idx)
                 if any(v in h.lower() for v in ['image', 'img', 'picture', 'pic']):
-                    ws.column_dimensions[col_letter].width = 20
+                    width_overrides[col_idx + 1] = 20
                 elif h.lower() in ['description', 'desc']:
-                    ws.column_dimensions[col_letter].width = 65
-                    # Re-apply wrapping as auto_adjust might have affected it
-                    for r in range(1, ws.max_row + 1):
-                        cell = ws.cell(row=r, column=col_idx + 1)
-                        if cell.value and r > 1: # Skip title/header
-                            cell.alignment = Alignment(wrap_text=True, vertical='center', horizontal='left')
+                    width_overrides[col_idx + 1] = 65
+        
+        # Size everything else from the tracked lengths, then apply the fixed widths
+        column_dimensions = ws.column_dimensions
+        for col_num in range(1, ws.max_column + 1):
+            if col_num not in width_overrides:
+                letter = COLUMN_LETTERS[col_num - 1] if col_num <= 26 else get_column_letter(col_num)
+                column_dimensions[letter].width = min(col_lengths.get(col_num, 0) + 2, 50)
+        
+        for col_num, width in width_overrides.items():
+            letter = COLUMN_LETTERS[col_num - 1] if col_num <= 26 else get_column_letter(col_num)
+            column_dimensions[letter].width = width
+            if width == 65:
+                # Wrap description text
+                for r in range(2, ws.max_row + 1): # Skip title/header
+                    cell = ws.cell(row=r, column=col_num)
+                    if cell.value:
+                        cell.alignment = WRAP_ALIGNMENT
         
         wb.save(filename)
         
@@ -602,41 +701,57 @@ class DownloadManager:
         return filename
     
     def create_ve_excel(self, ve_data, output_dir, file_id):
-        """Create Excel file for value engineering alternatives"""
+        """Create Excel file for value engineering alternatives (pure data, written with xlsxwriter)"""
         filename = os.path.join(output_dir, f've_alternatives_{file_id}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx')
         
-        wb = Workbook()
-        ws = wb.active
-        ws.title = 'Alternatives'
+        # constant_memory streams each row to disk once the next row starts (inline strings,
+        # no shared string table); strings are written verbatim, without URL/formula sniffing
+        workbook = xlsxwriter.Workbook(filename, {
+            'constant_memory': True,
+            'strings_to_urls': False,
+            'strings_to_formulas': False,
+        })
+        ws = workbook.add_worksheet('Alternatives')
+        title_fmt = workbook.add_format(XLSX_TITLE_FORMAT)
+        header_fmt = workbook.add_format(XLSX_HEADER_FORMAT)
         
         # Logo removed from Excel exports per user request
         
         # Title
-        ws.append([f'VALUE ENGINEERED ALTERNATIVES - {ve_data["budget_option"].upper()}'])
-        ws.merge_cells('A3:H3')
-        self.style_title_row(ws, 3)
-        ws.append([])
+        ws.merge_range(0, 0, 0, 7, f'VALUE ENGINEERED ALTERNATIVES - {ve_data["budget_option"].upper()}', title_fmt)
+        
+        # Rows are not kept around, column widths are tracked while appending
+        next_row = 2
+        max_lengths = {}
+        
+        def append(values, fmt=None):
+            nonlocal next_row
+            ws.write_row(next_row, 0, values, fmt)
+            next_row += 1
+            for col, value in enumerate(values):
+                if value:
+                    length = len(str(value))
+                    if length > max_lengths.get(col, 0):
+                        max_lengths[col] = length
         
         # Process alternatives
         for alt_group in ve_data['alternatives']:
             original = alt_group['original_item']
             
             # Original item
-            ws.append(['ORIGINAL ITEM'])
-            ws.append(['Description:', original.get('description', '')])
-            ws.append(['Quantity:', f"{original.get('qty', '')} {original.get('unit', '')}"])
-            ws.append(['Unit Rate:', original.get('unit_rate', '')])
-            ws.append(['Total:', original.get('total', '')])
-            ws.append([])
+            append(['ORIGINAL ITEM'])
+            append(['Description:', original.get('description', '')])
+            append(['Quantity:', f"{original.get('qty', '')} {original.get('unit', '')}"])
+            append(['Unit Rate:', original.get('unit_rate', '')])
+            append(['Total:', original.get('total', '')])
+            append([])
             
             # Alternatives
-            ws.append(['ALTERNATIVES'])
-            headers = ['Brand', 'Model', 'Description', 'Unit Rate', 'Total', 'Lead Time']
-            ws.append(headers)
-            self.style_header_row(ws, ws.max_row)
+            append(['ALTERNATIVES'])
+            append(['Brand', 'Model', 'Description', 'Unit Rate', 'Total', 'Lead Time'], header_fmt)
             
             for alt in alt_group['alternatives']:
-                ws.append([
+                append([
                     alt['brand'],
                     alt['model'],
                     alt['description'],
@@ -645,23 +760,86 @@ class DownloadManager:
                     alt['lead_time']
                 ])
             
-            ws.append([])
-            ws.append([])  # Double space between items
+            append([])
+            append([])  # Double space between items
         
-        self.auto_adjust_columns(ws)
+        for col, length in max_lengths.items():
+            ws.set_column(col, col, min(length + 2, 50))
         
-        wb.save(filename)
+        with fast_deflate():
+            workbook.close()
         return filename
     
+    def _prepare_excel_images(self, image_jobs, temp_files):
+        """
+        Download and convert all distinct images referenced by image_jobs in parallel.
+        
+        Logos are converted to RGBA and product images to RGB PNG temp files.
+        
+        Returns:
+            Dict mapping (source, mode) to a (status, path) tuple where status is
+            'ok', 'missing' or 'error'
+        """
+        sources = []
+        for _, _, _, image_url, brand_logo_url in image_jobs:
+            if brand_logo_url:
+                sources.append((brand_logo_url, 'RGBA'))
+            if image_url:
+                sources.append((image_url, 'RGB'))
+        sources = list(dict.fromkeys(sources))
+        if not sources:
+            return {}
+        
+        with ThreadPoolExecutor(max_workers=min(8, len(sources))) as executor:
+            results = list(executor.map(lambda src: self._prepare_excel_image(*src), sources))
+        
+        for status, path in results:
+            if status == 'ok':
+                temp_files.append(path)
+        return dict(zip(sources, results))
+    
+    def _prepare_excel_image(self, source, mode):
+        """Fetch a single image and save it as a PNG temp file in the given mode"""
+        cached = download_image(source) if str(source).startswith('http') else source
+        if not cached or not os.path.exists(str(cached)):
+            return ('missing', cached)
+        
+        try:
+            # Use tempfile path to avoid 'fp' attribute error in openpyxl
+            with PIL_Image.open(str(cached)) as pil_img:
+                tmp = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
+                pil_img.convert(mode).save(tmp.name, format='PNG')
+                tmp.close()
+            return ('ok', tmp.name)
+        except Exception as e:
+            logger.warning(f"Error converting image {source} for Excel: {e}\n{traceback.format_exc()}")
+            return ('error', None)
+    
+    def _anchor_image(self, ws, image_path, col_idx, row_num, width, height, row_off):
+        """Anchor an image file at a fixed pixel offset inside a cell"""
+        img_xl = XLImage(image_path)
+        img_xl.width = width
+        img_xl.height = height
+        
+        marker = AnchorMarker(col=col_idx, colOff=pixels_to_EMU(10), row=row_num - 1, rowOff=pixels_to_EMU(row_off))
+        # XLImage from path should have _extent, but manual set is safer
+        ext = XDRPositiveSize2D(pixels_to_EMU(width), pixels_to_EMU(height))
+        img_xl.anchor = OneCellAnchor(_from=marker, ext=ext)
+        ws.add_image(img_xl)
+    
     def contains_image(self, cell_value):
         """Check if cell contains an image reference"""
-        return '<img' in str(cell_value).lower() or 'img_in_' in str(cell_value).lower()
+        if not isinstance(cell_value, str):
+            cell_value = str(cell_value)
+        return IMAGE_REFERENCE_RE.search(cell_value) is not None
     
     def extract_image_path(self, cell_value, session_id, file_id):
         """Extract image path or URL from cell value"""
         try:
             # Look for img src pattern
-            match = re.search(r'src=["\']([^"\']+)["\']', str(cell_value))
+            if not isinstance(cell_value, str):
+                cell_value = str(cell_value)
+            match = IMAGE_SRC_RE.search(cell_value)
             if match:
                 img_path_or_url = match.group(1)
                 
@@ -669,27 +847,33 @@ class DownloadManager:
                 if img_path_or_url.startswith('http'):
                     return img_path_or_url
                 
+                key = (session_id, file_id, img_path_or_url)
+                img_path = self._img_path_cache.get(key)
+                if img_path is not None:
+                    return img_path
+                
                 # Try to find it relative to current directory (for static/ paths)
                 # Remove leading slash if any
                 clean_path = img_path_or_url.lstrip('/')
                 if os.path.exists(clean_path):
-                    return clean_path
+                    img_path = clean_path
                 
                 # Check for other common paths
-                if clean_path.startswith('static/'):
-                    return os.path.abspath(clean_path)
+                elif clean_path.startswith('static/'):
+                    img_path = os.path.abspath(clean_path)
                 
                 # Default to outputs/ (legacy behavior)
-                if not clean_path.startswith('outputs'):
+                elif not clean_path.startswith('outputs'):
                     img_path = os.path.join('outputs', session_id, file_id, clean_path)
                 else:
                     img_path = clean_path
                 
+                self._img_path_cache[key] = img_path
                 return img_path
             
             # Try to find image reference in text
-            if 'img_in_' in str(cell_value):
-                match = re.search(r'(imgs/img_in_[^"\s<>]+\.jpg)', str(cell_value))
+            if 'img_in_' in cell_value:
+                match = IMAGE_FILE_RE.search(cell_value)
                 if match:
                     img_relative_path = match.group(1)
                     img_path = os.path.join('outputs', session_id, file_id, img_relative_path)
@@ -700,7 +884,13 @@ class DownloadManager:
         return None
     
     def parse_markdown_tables(self, markdown_text):
-        """Parse tables from markdown text"""
+        """
+        Parse tables from markdown text
+        
+        Returns:
+            List of {'headers': [...], 'rows': [[cell, ...], ...]} with rows
+            aligned to headers by position
+        """
         lines = markdown_text.split('\n')
         tables = []
         current_table = {'headers': [], 'rows': []}
@@ -708,20 +898,20 @@ class DownloadManager:
         
         for line in lines:
             if '|' in line:
-                cells = [cell.strip() for cell in line.split('|') if cell.strip()]
+                if in_table and MARKDOWN_SEPARATOR_RE.match(line):
+                    # Separator line - skip
+                    continue
+                
+                cells = [cell for cell in (c.strip() for c in line.split('|')) if cell]
                 
                 if not in_table:
                     # Start of table - headers
                     current_table['headers'] = cells
                     in_table = True
-                elif all(c in '-|: ' for c in line):
-                    # Separator line - skip
-                    continue
                 else:
                     # Data row
                     if len(cells) == len(current_table['headers']):
-                        row = dict(zip(current_table['headers'], cells))
-                        current_table['rows'].append(row)
+                        current_table['rows'].append(cells)
             else:
                 if in_table and current_table['rows']:
                     tables.append(current_table)
@@ -735,74 +925,61 @@ class DownloadManager:
     
     def calculate_subtotal(self, tables):
         """Calculate subtotal from tables"""
-        import re
         subtotal = 0.0
+        # Column name -> is a total column (rows usually share the same keys)
+        total_keys = {}
         
         for table in tables:
             for row in table['rows']:
                 for key, value in row.items():
-                    if 'total' in key.lower() and '_original' not in key:
+                    is_total = total_keys.get(key)
+                    if is_total is None:
+                        is_total = total_keys[key] = 'total' in key.lower() and '_original' not in key
+                    if is_total:
+                        cleaned = str(value).translate(NUMERIC_CHARS)
+                        # Skip blank/sign-only cells without raising
+                        if not cleaned or cleaned in '.-':
+                            continue
                         try:
-                            cleaned = re.sub(r'[^\d.-]', '', str(value))
-                            num_value = float(cleaned)
-                            subtotal += num_value
-                        except:
+                            subtotal += float(cleaned)
+                        except ValueError:
                             pass
         
         return subtotal
     
     def style_header_row(self, ws, row_num):
         """Apply styling to header row"""
-        header_fill = PatternFill(start_color='667EEA', end_color='667EEA', fill_type='solid')
-        header_font = Font(bold=True, color='FFFFFF')
+        fill, font, alignment = HEADER_FILL, HEADER_FONT, CENTER_ALIGNMENT
         
         for cell in ws[row_num]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
+            cell.fill = fill
+            cell.font = font
+            cell.alignment = alignment
     
     def style_title_row(self, ws, row_num):
         """Apply styling to title row"""
-        title_fill = PatternFill(start_color='764BA2', end_color='764BA2', fill_type='solid')
-        title_font = Font(bold=True, size=16, color='FFFFFF')
+        fill, font, alignment = TITLE_FILL, TITLE_FONT, CENTER_ALIGNMENT
         
         for cell in ws[row_num]:
-            cell.fill = title_fill
-            cell.font = title_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
+            cell.fill = fill
+            cell.font = font
+            cell.alignment = alignment
     
     def style_summary_rows(self, ws, start_row, end_row):
         """Apply styling to summary rows"""
-        bold_font = Font(bold=True)
+        font, alignment = SUMMARY_FONT, SUMMARY_ALIGNMENT
         
         for row_num in range(start_row, end_row + 1):
             for cell in ws[row_num]:
                 if cell.value:
-                    cell.font = bold_font
-                    cell.alignment = Alignment(horizontal='right')
+                    cell.font = font
+                    cell.alignment = alignment
     
-    def auto_adjust_columns(self, ws):
-        """Auto-adjust column widths based on content"""
-        from openpyxl.cell.cell import MergedCell
-        
-        for column in ws.columns:
-            max_length = 0
-            column_letter = None
-            
-            for cell in column:
-                try:
-                    # Skip merged cells
-                    if isinstance(cell, MergedCell):
-                        continue
-                    
-                    if column_letter is None:
-                        column_letter = cell.column_letter
-                    
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                except:
-                    pass
-            
-            if column_letter:
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
+    def _column_widths(self, rows):
+        """Compute auto-fit column widths (longest value + 2, capped at 50) for in-memory rows"""
+        max_lengths = {}
+        for row in rows:
+            for col, value in enumerate(row):
+                if value:
+                    max_lengths[col] = max(max_lengths.get(col, 0), len(str(value)))
+        return {col: min(length + 2, 50) for col, length in max_lengths.items()}
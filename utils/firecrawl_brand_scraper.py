@@ -5,13 +5,57 @@ Uses Firecrawl API to crawl brand websites and extract product information
 
 import re
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 from urllib.parse import urlparse, urljoin
-from firecrawl import Firecrawl
 
 logger = logging.getLogger(__name__)
 
+# URL classification
+EXCLUDE_URL_RE = re.compile(r'/product-category/|/category/|/archive|/page/\d+', re.IGNORECASE)
+PRODUCT_URL_RE = re.compile(
+    r'/product/[^/]+/?$'  # /product/chair-name/
+    r'|/item/[^/]+/?$'
+    r'|/p/[^/]+/?$'
+    r'|-\d+\.html$',
+    re.IGNORECASE
+)
+CATEGORY_URL_RE = re.compile(
+    r'/product-category/|/category/|/product-tag/|/collection/|/shop/?$|/products/?$',
+    re.IGNORECASE
+)
+CATEGORY_LINK_RE = re.compile(r'/product-category/|/category/|/tag/', re.IGNORECASE)
+
+# Markdown extraction
+# Link titles that are navigation/UI elements or common category names
+LISTING_SKIP_TERMS = (
+    'add to', 'select option', 'wishlist', 'cart', 'home', 'archives',
+    'open submenu', 'contact for price', 'showing', 'filter', 'sort by',
+    'page', 'next', 'previous', 'view:', 'categories', 'tags',
+    'coffee table', 'accessories', 'new arrivals', 'desks', 'chairs',
+    'storage', 'sofa'
+)
+LISTING_SKIP_RE = re.compile('|'.join(map(re.escape, LISTING_SKIP_TERMS)), re.IGNORECASE)
+# Section headings that are listing controls rather than products
+SECTION_SKIP_RE = re.compile(r'filter|sort|view|showing|page', re.IGNORECASE)
+PRODUCT_LINK_COUNT_RE = re.compile(r'\[.*?\]\(.*?/product/.*?\)')
+PRODUCT_LINK_RE = re.compile(r'\[([^\]]+)\]\((https?://[^)]+/product/[^)]+)\)', re.IGNORECASE)
+SECTION_RE = re.compile(r'###\s+\[?([^\]\n]+)\]?[^\n]*\n+((?:.*?\n)*?)(?=###|\Z)', re.MULTILINE)
+SECTION_PRODUCT_URL_RE = re.compile(r'\((https?://[^)]+/product/[^)]+)\)')
+MARKDOWN_IMAGE_RE = re.compile(r'!\[.*?\]\((https?://[^)]+)\)')
+H1_RE = re.compile(r'^#\s+(.+)$', re.MULTILINE)
+PARAGRAPH_RE = re.compile(r'\n\n(.+?)\n\n', re.DOTALL)
+
+# Title cleanup
+TITLE_SUFFIX_RE = re.compile(r'\s*[-|]\s*.+$')  # Everything after - or |
+TITLE_PARENS_RE = re.compile(r'\s*\(.*?\)')
+TITLE_NOISE_RE = re.compile(r'\b(buy|shop|price|online)\b', re.IGNORECASE)
+
+PRICE_RES = (
+    re.compile(r'(?:Price|Cost|AED|USD|\$|€|£)\s*:?\s*(\d+(?:[.,]\d{2})?)'),
+    re.compile(r'(\d+(?:[.,]\d{2})?)\s*(?:AED|USD|\$|€|£)'),
+)
+
 
 class FirecrawlBrandScraper:
     """
@@ -25,9 +69,19 @@ class FirecrawlBrandScraper:
         Args:
             api_key: Firecrawl API key
         """
+        # Imported here so the module loads without pulling in the Firecrawl SDK
+        from firecrawl import Firecrawl
+        
         self.api_key = api_key
         self.firecrawl = Firecrawl(api_key=api_key)
         
+        # (first, second) path segment -> (category, subcategory)
+        self._category_cache: Dict[Tuple[str, ...], Tuple[str, Optional[str]]] = {}
+        # brand name -> compiled word-boundary pattern
+        self._brand_pattern_cache: Dict[str, re.Pattern] = {}
+        # (brand name, raw title) -> cleaned title
+        self._title_cache: Dict[Tuple[str, str], str] = {}
+        
     def scrape_brand_website(
         self, 
         website: str, 
@@ -92,8 +146,9 @@ class FirecrawlBrandScraper:
             
             logger.info(f"Successfully retrieved {len(pages_data)} pages, now processing...")
             
-            # Parse crawl results - wrap in expected dict format
-            result = self._parse_crawl_results({'data': pages_data}, brand_name, website)
+            # Parse crawl results - wrap in expected dict format; pages are
+            # released from the response list as soon as they are processed
+            result = self._parse_crawl_results({'data': self._consume_pages(pages_data)}, brand_name, website)
             
             logger.info(f"✅ Extraction complete: {result['total_products']} products found in {result['total_collections']} collections")
             
@@ -105,12 +160,22 @@ class FirecrawlBrandScraper:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return self._empty_result(brand_name)
     
+    def _consume_pages(self, pages: List[Dict]) -> Iterator[Dict]:
+        """
+        Yield crawled pages in order, dropping each one from the list once handed out
+        so a page's HTML/markdown can be freed as soon as it has been parsed
+        """
+        for idx in range(len(pages)):
+            page = pages[idx]
+            pages[idx] = None
+            yield page
+    
     def _parse_crawl_results(self, crawl_result: Dict, brand_name: str, base_url: str) -> Dict:
         """
         Parse Firecrawl crawl results and extract products
         
         Args:
-            crawl_result: Firecrawl crawl response
+            crawl_result: Firecrawl crawl response ('data' may be any iterable of pages)
             brand_name: Brand name
             base_url: Base website URL
             
@@ -129,15 +194,18 @@ class FirecrawlBrandScraper:
         
         pages = crawl_result.get('data', [])
         
-        # Extract products from each page
+        # Extract products from each page as it is consumed
         for page in pages:
             url = page.get('metadata', {}).get('sourceURL', '')
             markdown = page.get('markdown', '')
             html = page.get('html', '')
             metadata = page.get('metadata', {})
             
+            # Classify once; listing links are reused for extraction
+            page_type, product_links = self._classify_page(url, markdown, metadata)
+            
             # Check if this is a product page
-            if self._is_product_page(url, markdown, metadata):
+            if page_type == 'product':
                 product = self._extract_product_from_page(
                     url, markdown, html, metadata, brand_name
                 )
@@ -164,12 +232,15 @@ class FirecrawlBrandScraper:
                             'products': []
                         }
                     
-                    result['collections'][coll_key]['products'].append(product)
+                    collection = result['collections'][coll_key]
+                    collection['products'].append(product)
+                    collection['product_count'] += 1
                     result['all_products'].append(product)
+                    result['total_products'] += 1
             
             # Also check if this is a category/listing page with multiple products
-            elif self._is_category_page(url, markdown):
-                products = self._extract_products_from_listing(url, markdown, brand_name)
+            elif page_type == 'category':
+                products = self._extract_products_from_listing(url, markdown, brand_name, product_links)
                 if products:
                     logger.info(f"Extracted {len(products)} products from listing page: {url}")
                     for product in products:
@@ -194,20 +265,39 @@ class FirecrawlBrandScraper:
                                 'products': []
                             }
                         
-                        result['collections'][coll_key]['products'].append(product)
+                        collection = result['collections'][coll_key]
+                        collection['products'].append(product)
+                        collection['product_count'] += 1
                         result['all_products'].append(product)
+                        result['total_products'] += 1
         
-        # Update counts
-        for coll_key in result['collections']:
-            result['collections'][coll_key]['product_count'] = len(
-                result['collections'][coll_key]['products']
-            )
-        
-        result['total_products'] = len(result['all_products'])
+        # Product counts are kept up to date as products are added
         result['total_collections'] = len(result['collections'])
         
         return result
     
+    def _classify_page(self, url: str, markdown: str, metadata: Dict) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+        """
+        Classify a crawled page, extracting product links only for listings
+        
+        Args:
+            url: Page URL
+            markdown: Page markdown content
+            metadata: Page metadata
+            
+        Returns:
+            Tuple of (page_type, product_links) where page_type is 'product',
+            'category' or None and product_links are the (title, url) product
+            links found in the markdown (empty unless the page is a listing)
+        """
+        if self._is_product_page(url, markdown, metadata):
+            return 'product', []
+        
+        if self._is_category_page(url, markdown):
+            return 'category', PRODUCT_LINK_RE.findall(markdown)
+        
+        return None, []
+    
     def _is_product_page(self, url: str, markdown: str, metadata: Dict) -> bool:
         """
         Determine if a page is a product page
@@ -221,20 +311,12 @@ class FirecrawlBrandScraper:
             True if product page, False otherwise
         """
         # Exclude category/listing pages first
-        if re.search(r'/product-category/|/category/|/archive|/page/\d+', url, re.IGNORECASE):
+        if EXCLUDE_URL_RE.search(url):
             return False
             
         # Check URL patterns for individual products
-        product_patterns = [
-            r'/product/[^/]+/?$',  # /product/chair-name/
-            r'/item/[^/]+/?$',
-            r'/p/[^/]+/?$',
-            r'-\d+\.html$'
-        ]
-        
-        for pattern in product_patterns:
-            if re.search(pattern, url, re.IGNORECASE):
-                return True
+        if PRODUCT_URL_RE.search(url):
+            return True
         
         # Check metadata
         og_type = metadata.get('ogType', '')
@@ -255,22 +337,12 @@ class FirecrawlBrandScraper:
             True if category page, False otherwise
         """
         # Check URL patterns
-        category_patterns = [
-            r'/product-category/',
-            r'/category/',
-            r'/product-tag/',
-            r'/collection/',
-            r'/shop/?$',
-            r'/products/?$'
-        ]
-        
-        for pattern in category_patterns:
-            if re.search(pattern, url, re.IGNORECASE):
-                return True
+        if CATEGORY_URL_RE.search(url):
+            return True
         
         # Check for multiple product listings in markdown
-        # Look for repeated product patterns
-        product_link_count = len(re.findall(r'\[.*?\]\(.*?/product/.*?\)', markdown))
+        # Look for repeated product patterns (any link text, including image cards)
+        product_link_count = len(PRODUCT_LINK_COUNT_RE.findall(markdown))
         if product_link_count >= 3:  # If 3 or more product links, it's likely a listing
             return True
         
@@ -280,7 +352,8 @@ class FirecrawlBrandScraper:
         self, 
         url: str, 
         markdown: str,
-        brand_name: str
+        brand_name: str,
+        product_links: Optional[List[Tuple[str, str]]] = None
     ) -> List[Dict]:
         """
         Extract multiple products from a category/listing page
@@ -289,16 +362,17 @@ class FirecrawlBrandScraper:
             url: Page URL
             markdown: Page markdown content
             brand_name: Brand name
+            product_links: Product links already extracted from the markdown (optional)
             
         Returns:
             List of product dictionaries
         """
         products = []
+        seen_urls = set()
         
         # Try to find product blocks in markdown
         # Pattern: Product title followed by link
-        product_pattern = r'\[([^\]]+)\]\((https?://[^)]+/product/[^)]+)\)'
-        matches = re.findall(product_pattern, markdown, re.IGNORECASE)
+        matches = product_links if product_links is not None else PRODUCT_LINK_RE.findall(markdown)
         
         for title, product_url in matches:
             # Clean title
@@ -307,18 +381,11 @@ class FirecrawlBrandScraper:
                 continue
             
             # Skip navigation/UI elements and category links
-            skip_terms = [
-                'add to', 'select option', 'wishlist', 'cart', 'home', 'archives',
-                'open submenu', 'contact for price', 'showing', 'filter', 'sort by',
-                'page', 'next', 'previous', 'view:', 'categories', 'tags',
-                'coffee table', 'accessories', 'new arrivals', 'desks', 'chairs', 
-                'storage', 'sofa'  # Common category names
-            ]
-            if any(skip in title.lower() for skip in skip_terms):
+            if LISTING_SKIP_RE.search(title):
                 continue
             
             # Skip if URL is a category page, not a product page
-            if re.search(r'/product-category/|/category/|/tag/', product_url, re.IGNORECASE):
+            if CATEGORY_LINK_RE.search(product_url):
                 continue
             
             # Create product
@@ -335,27 +402,28 @@ class FirecrawlBrandScraper:
             }
             
             products.append(product)
+            seen_urls.add(product_url)
         
         # Also try to extract product info from structured markdown sections
         # Look for patterns like "### Product Name" followed by content
-        section_pattern = r'###\s+\[?([^\]\n]+)\]?[^\n]*\n+((?:.*?\n)*?)(?=###|\Z)'
-        sections = re.findall(section_pattern, markdown, re.MULTILINE)
+        sections = SECTION_RE.findall(markdown)
         
         for section_title, section_content in sections:
             section_title = section_title.strip()
             
             # Skip non-product sections
-            if any(skip in section_title.lower() for skip in ['filter', 'sort', 'view', 'showing', 'page']):
+            if SECTION_SKIP_RE.search(section_title):
                 continue
             
             # Look for product URL in section
-            url_match = re.search(r'\((https?://[^)]+/product/[^)]+)\)', section_content)
+            url_match = SECTION_PRODUCT_URL_RE.search(section_content)
             if url_match:
                 product_url = url_match.group(1)
                 
                 # Check if we already have this product
-                if any(p['source_url'] == product_url for p in products):
+                if product_url in seen_urls:
                     continue
+                seen_urls.add(product_url)
                 
                 product = {
                     'name': section_title,
@@ -370,7 +438,7 @@ class FirecrawlBrandScraper:
                 }
                 
                 # Try to extract image
-                img_match = re.search(r'!\[.*?\]\((https?://[^)]+)\)', section_content)
+                img_match = MARKDOWN_IMAGE_RE.search(section_content)
                 if img_match:
                     product['image_url'] = img_match.group(1)
                 
@@ -405,7 +473,7 @@ class FirecrawlBrandScraper:
             title = metadata.get('title', '')
             if not title:
                 # Try to extract from markdown (first H1)
-                h1_match = re.search(r'^#\s+(.+)$', markdown, re.MULTILINE)
+                h1_match = H1_RE.search(markdown)
                 if h1_match:
                     title = h1_match.group(1).strip()
             
@@ -419,7 +487,7 @@ class FirecrawlBrandScraper:
             image_url = metadata.get('ogImage', '')
             if not image_url:
                 # Try to find first image in markdown
-                img_match = re.search(r'!\[.*?\]\((https?://[^\)]+)\)', markdown)
+                img_match = MARKDOWN_IMAGE_RE.search(markdown)
                 if img_match:
                     image_url = img_match.group(1)
             
@@ -430,7 +498,7 @@ class FirecrawlBrandScraper:
             description = metadata.get('description', '')
             if not description:
                 # Get first paragraph from markdown
-                para_match = re.search(r'\n\n(.+?)\n\n', markdown, re.DOTALL)
+                para_match = PARAGRAPH_RE.search(markdown)
                 if para_match:
                     description = para_match.group(1).strip()[:200]
             
@@ -455,26 +523,35 @@ class FirecrawlBrandScraper:
         if not title:
             return ""
         
+        key = (brand_name, title)
+        cached = self._title_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        brand_pattern = self._brand_pattern_cache.get(brand_name)
+        if brand_pattern is None:
+            brand_pattern = re.compile(rf'\b{re.escape(brand_name)}\b', re.IGNORECASE)
+            self._brand_pattern_cache[brand_name] = brand_pattern
+        
         # Remove brand name
-        title = re.sub(rf'\b{re.escape(brand_name)}\b', '', title, flags=re.IGNORECASE)
+        title = brand_pattern.sub('', title)
         
         # Remove common suffixes
-        title = re.sub(r'\s*[-|]\s*.+$', '', title)  # Remove everything after - or |
-        title = re.sub(r'\s*\(.*?\)', '', title)  # Remove parentheses
-        title = re.sub(r'\b(buy|shop|price|online)\b', '', title, flags=re.IGNORECASE)
+        title = TITLE_SUFFIX_RE.sub('', title)
+        title = TITLE_PARENS_RE.sub('', title)  # Remove parentheses
+        title = TITLE_NOISE_RE.sub('', title)
+        title = title.strip()
         
-        return title.strip()
+        if len(self._title_cache) >= 1024:
+            self._title_cache.clear()
+        self._title_cache[key] = title
+        
+        return title
     
     def _extract_price(self, markdown: str, html: str) -> Optional[str]:
         """Extract price from markdown or HTML"""
-        # Price patterns
-        patterns = [
-            r'(?:Price|Cost|AED|USD|\$|€|£)\s*:?\s*(\d+(?:[.,]\d{2})?)',
-            r'(\d+(?:[.,]\d{2})?)\s*(?:AED|USD|\$|€|£)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, markdown)
+        for pattern in PRICE_RES:
+            match = pattern.search(markdown)
             if match:
                 return match.group(1)
         
@@ -491,11 +568,28 @@ class FirecrawlBrandScraper:
         Returns:
             Tuple of (category, subcategory)
         """
-        parsed = urlparse(url)
-        path_parts = [p for p in parsed.path.split('/') if p and p != 'product']
+        # Path only (no scheme, host, query or fragment) - cheaper than urlparse
+        scheme_end = url.find('://')
+        if scheme_end == -1:
+            path = urlparse(url).path
+        else:
+            path = url
+            for sep in ('#', '?'):
+                sep_idx = path.find(sep)
+                if sep_idx != -1:
+                    path = path[:sep_idx]
+            path_start = path.find('/', scheme_end + 3)
+            path = path[path_start:] if path_start != -1 else ''
+        
+        path_parts = [p for p in path.split('/') if p and p != 'product']
         
         # Try to extract from breadcrumbs in metadata
-        # For now, use URL path
+        # For now, use URL path; only the first two segments matter, so
+        # products of the same collection share one cache entry
+        key = tuple(path_parts[:2])
+        cached = self._category_cache.get(key)
+        if cached is not None:
+            return cached
         
         category = "Products"
         subcategory = None
@@ -508,6 +602,10 @@ class FirecrawlBrandScraper:
             # e.g., /chairs/product-name
             category = path_parts[0].replace('-', ' ').title()
         
+        if len(self._category_cache) >= 1024:
+            self._category_cache.clear()
+        self._category_cache[key] = (category, subcategory)
+        
         return category, subcategory
     
     def _empty_result(self, brand_name: str) -> Dict:
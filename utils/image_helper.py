@@ -1,12 +1,43 @@
 """Helper functions for downloading and caching product images"""
 import os
+import re
+import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import hashlib
+import threading
+from functools import lru_cache
+from itertools import chain
 from urllib.parse import urlparse
 import logging
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Shared session so repeated image downloads reuse pooled keep-alive connections
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+})
+_http_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+)
+_HTTP_SESSION.mount('http://', _http_adapter)
+_HTTP_SESSION.mount('https://', _http_adapter)
+
+# Brand name -> safe filename stem, and brand name normalization for matching
+SAFE_BRAND_NAME_RE = re.compile(r'[^\w\-_]')
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+
 # Configurable brands data directory - matches app.py logic for Railway persistence
 BRANDS_DATA_DIR = os.environ.get('BRANDS_DATA_PATH')
 if not BRANDS_DATA_DIR:
@@ -15,6 +46,190 @@ if not BRANDS_DATA_DIR:
     else:
         BRANDS_DATA_DIR = 'brands_data'
 
+
+def _read_json(file_path):
+    """Parse a JSON file, using orjson (bytes in, no decode step) when installed"""
+    if ORJSON_AVAILABLE:
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# file path -> ((mtime_ns, size), parsed brand data); brand files are rewritten at runtime
+_BRAND_FILE_CACHE = {}
+
+
+def _load_brand_file(file_path):
+    """
+    Load a brand JSON file, reusing the parsed data until the file changes on disk
+    
+    The returned dict is shared between callers and must not be mutated.
+    """
+    st = os.stat(file_path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _BRAND_FILE_CACHE.get(file_path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    
+    brand_data = _read_json(file_path)
+    _BRAND_FILE_CACHE[file_path] = (stamp, brand_data)
+    return brand_data
+
+def _normalize_name(name):
+    """Normalize a brand name for matching (lowercase, remove special chars)"""
+    if not name:
+        return ''
+    return NON_ALNUM_RE.sub('', name.lower())
+
+
+# Brand files of BRANDS_DATA_DIR in listing order, rebuilt when the directory changes
+_BRAND_FILE_INDEX = {'dir': None, 'mtime_ns': None, 'files': [], 'by_lower_name': {}, 'by_brand': None}
+
+
+def _get_brand_file_index():
+    """
+    Return the brand file index for BRANDS_DATA_DIR
+    
+    'files' holds (filename, lowercase base, normalized base, path) for every brand
+    JSON file (brands_dynamic.json excluded) in os.listdir order. 'by_lower_name'
+    maps every lowercased entry name to the path of the first entry with that
+    name, for case-insensitive filename lookups. 'by_brand' holds the
+    (file stamps, map) pair built lazily by _get_brands_by_field, since it
+    needs every file parsed.
+    """
+    global _BRAND_FILE_INDEX
+    
+    mtime_ns = os.stat(BRANDS_DATA_DIR).st_mtime_ns
+    index = _BRAND_FILE_INDEX
+    if index['dir'] == BRANDS_DATA_DIR and index['mtime_ns'] == mtime_ns:
+        return index
+    
+    files = []
+    by_lower_name = {}
+    with os.scandir(BRANDS_DATA_DIR) as entries:
+        for entry in entries:
+            filename = entry.name
+            by_lower_name.setdefault(filename.lower(), entry.path)
+            if filename.endswith('.json') and filename != 'brands_dynamic.json':
+                file_base = filename.rsplit('.', 1)[0]  # Remove .json extension
+                files.append((
+                    filename,
+                    file_base.lower(),
+                    _normalize_name(file_base),
+                    entry.path
+                ))
+    
+    index = {
+        'dir': BRANDS_DATA_DIR,
+        'mtime_ns': mtime_ns,
+        'files': files,
+        'by_lower_name': by_lower_name,
+        'by_brand': None
+    }
+    _BRAND_FILE_INDEX = index
+    return index
+
+
+def _get_brands_by_field(index):
+    """
+    Map normalized 'brand' field -> (filename, path) of the first file declaring it
+    
+    Rebuilt when any brand file's (mtime_ns, size) changes: app.py rewrites brand
+    files in place, which leaves the directory mtime (and the file index) as is.
+    Only the changed files are parsed again (see _load_brand_file).
+    """
+    stamps = []
+    for _, _, _, brand_file_path in index['files']:
+        try:
+            st = os.stat(brand_file_path)
+            stamps.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamps.append(None)
+    stamps = tuple(stamps)
+    
+    cached = index['by_brand']
+    if cached is not None and cached[0] == stamps:
+        return cached[1]
+    
+    by_brand = {}
+    for filename, _, _, brand_file_path in index['files']:
+        try:
+            file_brand = _normalize_name(_load_brand_file(brand_file_path).get('brand', ''))
+        except Exception:
+            continue
+        by_brand.setdefault(file_brand, (filename, brand_file_path))
+    index['by_brand'] = (stamps, by_brand)
+    return by_brand
+
+# file path -> (brand data, category index, collection index) built by _get_product_image_index
+_PRODUCT_IMAGE_INDEX = {}
+
+
+def _get_product_image_index(file_path, brand_data):
+    """
+    Return product image lookups for a loaded brand file
+    
+    Returns:
+        Tuple of ({(category, subcategory, model): image_url},
+        {collection product name or model: image_url}); models and names are
+        stripped and the first product wins, matching a front-to-back search
+    """
+    cached = _PRODUCT_IMAGE_INDEX.get(file_path)
+    if cached is not None and cached[0] is brand_data:
+        return cached[1], cached[2]
+    
+    by_category = {}
+    for category, subcategories in (brand_data.get('categories') or {}).items():
+        if not isinstance(subcategories, dict):
+            continue
+        for subcategory, products in subcategories.items():
+            for product in products:
+                model = (product.get('model') or '').strip()
+                by_category.setdefault((category, subcategory, model), product.get('image_url'))
+    
+    by_name = {}
+    collection_products = chain.from_iterable(
+        collection_data.get('products', [])
+        for collection_data in (brand_data.get('collections') or {}).values()
+    )
+    for product in collection_products:
+        image_url = product.get('image_url')
+        by_name.setdefault((product.get('name') or '').strip(), image_url)
+        by_name.setdefault((product.get('model') or '').strip(), image_url)
+    
+    _PRODUCT_IMAGE_INDEX[file_path] = (brand_data, by_category, by_name)
+    return by_category, by_name
+
+
+# Responses below this Content-Length are read in one go instead of streamed
+SMALL_IMAGE_BYTES = 256 * 1024
+
+# Cache paths already confirmed on disk; cached images are never deleted by the app
+_KNOWN_CACHED_IMAGES = set()
+
+
+def _remember_cached_image(cache_path):
+    """Record a cache path as present so later lookups skip the stat() call"""
+    if len(_KNOWN_CACHED_IMAGES) >= 8192:
+        _KNOWN_CACHED_IMAGES.clear()
+    _KNOWN_CACHED_IMAGES.add(cache_path)
+
+
+@lru_cache(maxsize=4096)
+def _cache_path_for(image_url, cache_dir):
+    """Return the cache file path of an image URL (pure, so memoized per URL)"""
+    # Filename key only, not security sensitive; 16-byte digest keeps 32 hex chars
+    url_hash = hashlib.blake2b(image_url.encode(), digest_size=16).hexdigest()
+    parsed_url = urlparse(image_url)
+    ext = os.path.splitext(parsed_url.path)[1] or '.jpg'
+    if not ext.startswith('.'):
+        ext = '.' + ext
+    
+    cache_filename = f"{url_hash}{ext}"
+    return os.path.join(cache_dir, cache_filename)
+
+
 def download_image(image_url, cache_dir='static/product_images'):
     """
     Download and cache an image from URL
@@ -29,43 +244,79 @@ def download_image(image_url, cache_dir='static/product_images'):
     if not image_url:
         return None
     
+    tmp_path = None
     try:
-        # Create cache directory
-        os.makedirs(cache_dir, exist_ok=True)
-        
         # Generate cache filename from URL
-        url_hash = hashlib.md5(image_url.encode()).hexdigest()
-        parsed_url = urlparse(image_url)
-        ext = os.path.splitext(parsed_url.path)[1] or '.jpg'
-        if not ext.startswith('.'):
-            ext = '.' + ext
-        
-        cache_filename = f"{url_hash}{ext}"
-        cache_path = os.path.join(cache_dir, cache_filename)
+        cache_path = _cache_path_for(image_url, cache_dir)
         
         # Return cached path if exists
+        if cache_path in _KNOWN_CACHED_IMAGES:
+            return cache_path
         if os.path.exists(cache_path):
+            _remember_cached_image(cache_path)
             return cache_path
         
-        # Download image
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(image_url, headers=headers, timeout=10, stream=True)
-        response.raise_for_status()
+        # Create cache directory
+        os.makedirs(cache_dir, exist_ok=True)
+        
+        # Download image (closing the response hands the connection back to the pool)
+        with _HTTP_SESSION.get(image_url, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            
+            # Save to a private temp file and move it into place once complete,
+            # so an interrupted download never leaves a truncated cache entry
+            tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                content_length = int(response.headers.get('Content-Length', 0))
+            except ValueError:
+                content_length = 0
+            with open(tmp_path, 'wb') as f:
+                if 0 < content_length < SMALL_IMAGE_BYTES:
+                    # Typical thumbnails: one read and one write, no chunk loop
+                    f.write(response.content)
+                else:
+                    for chunk in response.iter_content(chunk_size=65536):
+                        f.write(chunk)
         
-        # Save to cache
-        with open(cache_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        os.replace(tmp_path, cache_path)
+        tmp_path = None
+        _remember_cached_image(cache_path)
         
         logger.info(f"Cached image: {image_url} -> {cache_path}")
         return cache_path
         
     except Exception as e:
         logger.warning(f"Failed to download image {image_url}: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
         return None
 
+def download_images(image_urls, cache_dir='static/product_images', max_workers=8):
+    """
+    Download and cache several images concurrently
+    
+    Args:
+        image_urls: Iterable of image URLs (duplicates and empty values are skipped)
+        cache_dir: Directory to cache images in
+        max_workers: Maximum number of parallel downloads
+    
+    Returns:
+        Dict mapping each URL to its local file path, or None if the download failed
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    urls = list(dict.fromkeys(url for url in image_urls if url))
+    if not urls:
+        return {}
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        paths = list(executor.map(lambda url: download_image(url, cache_dir), urls))
+    
+    return dict(zip(urls, paths))
+
 def get_product_image_url(brand_name, category, subcategory, model_name, tier='mid_range'):
     """
     Get product image URL from brand data
@@ -81,47 +332,30 @@ def get_product_image_url(brand_name, category, subcategory, model_name, tier='m
         Image URL if found, None otherwise
     """
     try:
-        import json
-        import re
-        import os
-        
         # Load brand data
-        safe_brand_name = re.sub(r'[^\w\-_]', '', brand_name.replace(' ', '_'))
+        safe_brand_name = SAFE_BRAND_NAME_RE.sub('', brand_name.replace(' ', '_'))
         filename = f"{safe_brand_name}_{tier}.json"
         filepath = os.path.join(BRANDS_DATA_DIR, filename)
         
         if not os.path.exists(filepath):
             # Try case-insensitive search
-            if os.path.exists(BRANDS_DATA_DIR):
-                for f in os.listdir(BRANDS_DATA_DIR):
-                    if f.lower() == filename.lower():
-                        filepath = os.path.join(BRANDS_DATA_DIR, f)
-                        break
+            if not os.path.exists(BRANDS_DATA_DIR):
+                return None
+            filepath = _get_brand_file_index()['by_lower_name'].get(filename.lower())
+            if filepath is None:
+                return None
         
-        if not os.path.exists(filepath):
-            return None
-        
-        with open(filepath, 'r', encoding='utf-8') as f:
-            brand_data = json.load(f)
+        brand_data = _load_brand_file(filepath)
+        by_category, by_name = _get_product_image_index(filepath, brand_data)
+        target = model_name.strip()
         
         # Search in categories
-        categories_data = brand_data.get('categories', {})
-        if category in categories_data:
-            subcategories = categories_data[category]
-            if subcategory in subcategories:
-                for product in subcategories[subcategory]:
-                    if product.get('model', '').strip() == model_name.strip():
-                        return product.get('image_url')
+        key = (category, subcategory, target)
+        if key in by_category:
+            return by_category[key]
         
         # Search in collections
-        collections = brand_data.get('collections', {})
-        for collection_name, collection_data in collections.items():
-            for product in collection_data.get('products', []):
-                if product.get('name', '').strip() == model_name.strip() or \
-                   product.get('model', '').strip() == model_name.strip():
-                    return product.get('image_url')
-        
-        return None
+        return by_name.get(target)
         
     except Exception as e:
         logger.warning(f"Error getting product image URL: {e}")
@@ -149,18 +383,11 @@ def get_brand_logo_url(brand_name):
     if not brand_name:
         return None
     
-    import json
-    import re
-    
     brand_name = brand_name.strip()
+    brand_lower = brand_name.lower()
     
-    # Normalize brand name for matching (lowercase, remove special chars)
-    def normalize_name(name):
-        if not name:
-            return ''
-        return re.sub(r'[^a-z0-9]', '', name.lower())
-    
-    normalized_brand = normalize_name(brand_name)
+    # Normalize brand name for matching (same as _normalize_name, reusing the lowercased name)
+    normalized_brand = NON_ALNUM_RE.sub('', brand_lower)
     
     if not os.path.exists(BRANDS_DATA_DIR):
         logger.warning(f"Brands data directory not found: {BRANDS_DATA_DIR}")
@@ -168,16 +395,21 @@ def get_brand_logo_url(brand_name):
     
     # Try to load from brand-specific JSON files ONLY (no brands_dynamic.json)
     try:
-        json_files = [f for f in os.listdir(BRANDS_DATA_DIR) 
-                      if f.endswith('.json') and f != 'brands_dynamic.json']
+        index = _get_brand_file_index()
+        brand_files = index['files']
         
         # Priority 1: Exact prefix match (case-insensitive) - DEFINITIVE MATCH
         # If we find a file that starts with the brand name, that IS the brand file
-        for filename in json_files:
-            file_base = filename.rsplit('.', 1)[0]  # Remove .json extension
-            # Check if file starts with brand name (handles B&T -> BT, etc.)
-            if file_base.lower().startswith(brand_name.lower().replace('&', '')):
-                brand_file_path = os.path.join(BRANDS_DATA_DIR, filename)
+        # (handles B&T -> BT, etc.)
+        # The same pass over the listing collects priority 3 filename candidates
+        prefix = brand_lower.replace('&', '')
+        check_fuzzy = len(normalized_brand) >= 3
+        fuzzy_candidates = []
+        for filename, file_base_lower, normalized_file, brand_file_path in brand_files:
+            if check_fuzzy and normalized_file.startswith(normalized_brand):
+                # Only match if the normalized brand is a significant substring
+                fuzzy_candidates.append((filename, brand_file_path))
+            if file_base_lower.startswith(prefix):
                 logo = _extract_logo_from_file(brand_file_path)
                 if logo:
                     logger.info(f"Found brand logo for '{brand_name}' via prefix match in {filename}")
@@ -189,53 +421,42 @@ def get_brand_logo_url(brand_name):
                     return None
         
         # Priority 2: Search within file content for brand field match - DEFINITIVE MATCH
-        for filename in json_files:
-            brand_file_path = os.path.join(BRANDS_DATA_DIR, filename)
+        # Exact normalized match on the brand field, looked up in the index
+        match = _get_brands_by_field(index).get(normalized_brand)
+        if match is not None:
+            filename, brand_file_path = match
             try:
-                with open(brand_file_path, 'r', encoding='utf-8') as f:
-                    brand_data = json.load(f)
-                    file_brand = brand_data.get('brand', '')
-                    # Exact normalized match on the brand field
-                    if normalize_name(file_brand) == normalized_brand:
-                        logo = brand_data.get('logo') or \
-                               brand_data.get('brand_info', {}).get('logo') or \
-                               brand_data.get('brand_logo')
-                        if logo:
-                            logger.info(f"Found brand logo for '{brand_name}' via content match in {filename}")
-                            return logo
-                        else:
-                            # CRITICAL: This IS the correct brand file but has no logo
-                            # Return None, do NOT continue searching other files
-                            logger.warning(f"Brand file {filename} matched for '{brand_name}' but has no logo - returning None (not falling back)")
-                            return None
+                brand_data = _load_brand_file(brand_file_path)
             except Exception:
-                continue
+                match = None
+        if match is not None:
+            logo = _logo_from_brand_data(brand_data)
+            if logo:
+                logger.info(f"Found brand logo for '{brand_name}' via content match in {filename}")
+                return logo
+            else:
+                # CRITICAL: This IS the correct brand file but has no logo
+                # Return None, do NOT continue searching other files
+                logger.warning(f"Brand file {filename} matched for '{brand_name}' but has no logo - returning None (not falling back)")
+                return None
         
         # Priority 3: Normalized fuzzy match (only if no definitive match above)
         # This is a weaker match and should only be used as last resort
-        for filename in json_files:
-            file_base = filename.rsplit('.', 1)[0]
-            normalized_file = normalize_name(file_base)
-            # Only match if the normalized brand is a significant substring
-            if len(normalized_brand) >= 3 and normalized_file.startswith(normalized_brand):
-                brand_file_path = os.path.join(BRANDS_DATA_DIR, filename)
-                # Verify by checking brand field inside
-                try:
-                    with open(brand_file_path, 'r', encoding='utf-8') as f:
-                        brand_data = json.load(f)
-                        file_brand = normalize_name(brand_data.get('brand', ''))
-                        # Only use if brand field also matches
-                        if file_brand == normalized_brand or normalized_brand in file_brand:
-                            logo = brand_data.get('logo') or \
-                                   brand_data.get('brand_info', {}).get('logo') or \
-                                   brand_data.get('brand_logo')
-                            if logo:
-                                logger.info(f"Found brand logo for '{brand_name}' via fuzzy match in {filename}")
-                                return logo
-                except Exception:
-                    continue
+        for filename, brand_file_path in fuzzy_candidates:
+            # Verify by checking brand field inside
+            try:
+                brand_data = _load_brand_file(brand_file_path)
+                file_brand = _normalize_name(brand_data.get('brand', ''))
+                # Only use if brand field also matches
+                if file_brand == normalized_brand or normalized_brand in file_brand:
+                    logo = _logo_from_brand_data(brand_data)
+                    if logo:
+                        logger.info(f"Found brand logo for '{brand_name}' via fuzzy match in {filename}")
+                        return logo
+            except Exception:
+                continue
         
-        logger.warning(f"No brand logo found for '{brand_name}' in {len(json_files)} brand files")
+        logger.warning(f"No brand logo found for '{brand_name}' in {len(brand_files)} brand files")
         
     except Exception as e:
         logger.error(f"Error searching brand files: {e}")
@@ -253,17 +474,16 @@ def _extract_logo_from_file(file_path):
     Returns:
         Logo URL string if found, None otherwise
     """
-    import json
-    
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            brand_data = json.load(f)
-            # Check multiple possible keys for logo
-            logo = brand_data.get('logo') or \
-                   brand_data.get('brand_info', {}).get('logo') or \
-                   brand_data.get('brand_logo')
-            return logo
+        return _logo_from_brand_data(_load_brand_file(file_path))
     except Exception as e:
         logger.error(f"Error reading brand file {file_path}: {e}")
         return None
 
+
+def _logo_from_brand_data(brand_data):
+    """Return the logo URL of parsed brand data (checks multiple possible keys)"""
+    return brand_data.get('logo') or \
+           brand_data.get('brand_info', {}).get('logo') or \
+           brand_data.get('brand_logo')
+
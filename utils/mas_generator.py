@@ -1,25 +1,201 @@
 import os
 import re
+import html
 import logging
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from PIL import Image as PILImage
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image as RLImage, PageBreak
 from reportlab.pdfgen import canvas
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from datetime import datetime
+from io import BytesIO
 from bs4 import BeautifulSoup
+from utils.image_helper import get_brand_logo_url, download_image, download_images
 
 logger = logging.getLogger(__name__)
 
+# libxml2-backed parser for stitched tables when available, else the pure-Python one
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+WHITESPACE_RE = re.compile(r'\s+')
+IMG_SRC_RE = re.compile(r'src=["\']([^"\']+)["\']')
+# src attribute of <img> tags only - skips srcset/data-src and attributes on other tags
+IMG_TAG_SRC_RE = re.compile(r'<img\b[^>]*?(?<![\w-])src\s*=\s*(["\'])(.*?)\1', re.IGNORECASE | re.DOTALL)
+
+# Known brands in priority order; matched as case-insensitive substrings in one scan
+KNOWN_BRANDS = ('Sedus', 'Narbutas', 'Sokoa', 'B&T', 'Herman Miller', 'Steelcase', 'Vitra', 'Knoll', 'Haworth')
+KNOWN_BRAND_RE = re.compile('|'.join(map(re.escape, KNOWN_BRANDS)), re.IGNORECASE)
+
+# Specification keywords (case-insensitive substrings)
+MATERIAL_RE = re.compile(r'wood|metal|fabric|leather|plastic|steel|aluminum', re.IGNORECASE)
+FINISH_RE = re.compile(r'polished|matte|glossy|powder coated|chrome', re.IGNORECASE)
+
+# Header/footer colours, drawn on every page
+HEADER_GOLD = colors.HexColor('#d4af37')
+FOOTER_DARK = colors.HexColor('#1a365d')
+
+# Threads used to build page flowables (PIL decode/convert releases the GIL)
+MAS_PAGE_WORKERS = 8
+
+# Threads per page for product image download/conversion
+MAS_IMAGE_WORKERS = 4
+
+# Converted (WEBP/CMYK/alpha -> RGB JPEG) product images, shared across MAS builds.
+# Kept beside the downloaded product images - the session cleanup in app.py
+# removes every directory under outputs/
+MAS_IMAGE_CACHE_DIR = os.path.join('static', 'product_images', 'mas')
+# Converted images not used by any build for this long are pruned
+MAS_IMAGE_CACHE_TTL = 7 * 24 * 3600  # seconds
+# Longest side of a converted image: the largest slot (3.5in) at 150 dpi
+MAS_IMAGE_MAX_PX = int(3.5 * 150)
+MAS_IMAGE_JPEG_QUALITY = 85
+
+# Description cell: 5.7" column minus 4pt padding each side, 7pt Helvetica
+DESC_CELL_WIDTH = 5.7 * inch - 8
+DESC_FONT_SIZE = 7
+
+
+def prune_mas_image_cache(max_age=MAS_IMAGE_CACHE_TTL):
+    """
+    Delete converted product images no MAS build has used for max_age seconds
+    
+    Builds refresh the mtime of every cached image they reuse, so an image a
+    running build has handed to ReportLab is never old enough to be removed.
+    
+    Returns:
+        Number of files deleted
+    """
+    if not os.path.isdir(MAS_IMAGE_CACHE_DIR):
+        return 0
+    
+    cutoff_time = time.time() - max_age
+    removed = 0
+    with os.scandir(MAS_IMAGE_CACHE_DIR) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff_time:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"Could not prune cached MAS image {entry.name}: {e}")
+    return removed
+
+
+def _clean_cell_text(val):
+    """Replace HTML tags with spaces and collapse whitespace"""
+    if '<' in val:
+        val = HTML_TAG_RE.sub(' ', val)
+    return WHITESPACE_RE.sub(' ', val).strip()
+
+
+def _display_description(description):
+    """Description as shown on the MAS page - limited so it fits on one page"""
+    if len(description) > 400:
+        return description[:397] + '...'
+    return description
+
+
+@lru_cache(maxsize=4096)
+def _extract_brand(description):
+    """Brand named in a description (memoized: the same products recur across rows and tables)"""
+    found = {m.lower() for m in KNOWN_BRAND_RE.findall(description)}
+    if found:
+        # Several brands mentioned: keep the list priority, not the position in the text
+        for brand in KNOWN_BRANDS:
+            if brand.lower() in found:
+                return brand
+    
+    # Try to find capitalized words as potential brands
+    words = description.split()
+    for word in words:
+        if word and len(word) > 2 and word[0].isupper():
+            return word
+    
+    return 'To be specified'
+
+
+@lru_cache(maxsize=4096)
+def _extract_specifications(description):
+    """Compact specification lines for a description, as a tuple so the cached value can't be mutated"""
+    specs = []
+    
+    # Try to extract key specifications from description
+    # Material
+    if MATERIAL_RE.search(description):
+        specs.append('Material: As specified')
+    
+    # Finish
+    if FINISH_RE.search(description):
+        specs.append('Finish: As specified')
+    
+    # Always add these compact specs
+    if len(specs) < 2:
+        specs.append('Material/Finish: Per manufacturer standard')
+    
+    specs.append('Color: As per approved sample')
+    specs.append('Compliance: Meet relevant standards')
+    
+    return tuple(specs[:4])  # Limit to 4 specs maximum
+
+
+@dataclass(slots=True)
+class MASItem:
+    """One MAS page worth of item data (defaults match what a blank page shows)"""
+    description: str = 'N/A'
+    qty: str = 'N/A'
+    unit: str = ''
+    brand: Optional[str] = 'To be specified'
+    brand_logo: Optional[str] = None
+    specifications: List[str] = field(default_factory=list)
+    image_path: Optional[str] = None
+    image_paths: List[str] = field(default_factory=list)
+    reference_image_path: Optional[str] = None
+    reference_image_paths: List[str] = field(default_factory=list)
+    is_multibudget: bool = False
+    finish: str = 'As per manufacturer standard'
+    warranty: str = '5 Years'
+    description_display: Optional[str] = None
+    
+    def __post_init__(self):
+        if self.description_display is None:
+            self.description_display = _display_description(self.description)
+
+
 class MASGenerator:
     """Generate Material Approval Sheets (MAS) with company template"""
     
     def __init__(self):
         self.styles = getSampleStyleSheet()
         self.setup_custom_styles()
-        self.temp_files = []
+        # Header logo is resolved once here; the page callback never touches the filesystem
+        self._logo_path = self._find_logo_path()
+        # Lookups repeated for every item/page: brand logos, downloaded images
+        self._brand_logo_cache = {}
+        self._download_cache = {}
+        # Product image source -> (usable path, width, height)
+        self._product_image_cache = {}
+        # Directory -> entry names, for resolving extracted image paths
+        self._dir_listing_cache = {}
+        # (logo path, mtime) -> converted temp PNG, valid until temp files are cleaned up
+        self._logo_image_cache = {}
+        # (text, style name) -> Paragraph repeated on every page, valid for one build
+        self._para_cache = {}
     
     def setup_custom_styles(self):
         """Setup custom styles for MAS"""
@@ -48,8 +224,84 @@ class MASGenerator:
             leading=11,
             wordWrap='CJK'
         )
+        
+        # Smaller font for compact layout
+        self.desc_style = ParagraphStyle('DescCompact', parent=self.normal_style, fontSize=DESC_FONT_SIZE, leading=8)
+        self.spec_style = ParagraphStyle('SpecCompact', parent=self.normal_style, fontSize=7, leading=8)
+        self.remarks_style = ParagraphStyle('RemarksCompact', parent=self.normal_style, fontSize=7)
+        self.ref_label_style = ParagraphStyle('RefLabel', fontSize=7, textColor=colors.grey, alignment=2)  # alignment=2 is RIGHT
+        
+        # Table styles shared by every MAS page
+        self.header_table_style = TableStyle([
+            ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (0, 0), 14),
+            ('FONTNAME', (1, 0), (1, 0), 'Helvetica'),
+            ('FONTSIZE', (1, 0), (1, 0), 9),
+            ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ])
+        self.line_table_style = TableStyle([
+            ('LINEBELOW', (0, 0), (-1, -1), 2, colors.HexColor('#d4af37')),
+        ])
+        self.project_table_style = TableStyle([
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f0f0')),
+            ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#f0f0f0')),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 4),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+            ('TOPPADDING', (0, 0), (-1, -1), 4),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+        ])
+        self.details_table_style = TableStyle([
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f8f9fa')),
+            ('FONTSIZE', (1, 0), (1, 0), DESC_FONT_SIZE),
+            ('LEADING', (1, 0), (1, 0), 8),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 4),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+        ])
+        self.ref_table_style = TableStyle([
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ])
+        self.image_grid_table_style = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 1),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 1),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ])
+        self.approval_table_style = TableStyle([
+            ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 2), (0, 2), 'Helvetica-Bold'),
+            ('FONTNAME', (2, 0), (2, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (2, 2), (2, 2), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 7),  # Reduced from 8
+            ('LINEBELOW', (1, 1), (1, 1), 1, colors.black),
+            ('LINEBELOW', (3, 1), (3, 1), 1, colors.black),
+            ('LINEBELOW', (1, 3), (1, 3), 1, colors.black),
+            ('LINEBELOW', (3, 3), (3, 3), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('TOPPADDING', (0, 0), (-1, -1), 2),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+        ])
 
     def _get_logo_path(self):
+        return self._logo_path
+
+    def _find_logo_path(self):
         candidates = [
             os.path.join('static', 'images', 'AlShaya-Logo-color@2x.png'),
             os.path.join('static', 'images', 'LOGO.png'),
@@ -62,24 +314,32 @@ class MASGenerator:
 
     def _get_brand_logo(self, brand_name):
         """Get brand logo from JSON files or return None"""
-        from utils.image_helper import get_brand_logo_url
-        return get_brand_logo_url(brand_name)
+        if brand_name not in self._brand_logo_cache:
+            self._brand_logo_cache[brand_name] = get_brand_logo_url(brand_name)
+        return self._brand_logo_cache[brand_name]
+
+    def _download_image(self, image_url):
+        """Download (or reuse) a cached copy of an image URL, once per generator"""
+        if image_url not in self._download_cache:
+            self._download_cache[image_url] = download_image(image_url)
+        return self._download_cache[image_url]
 
     def _draw_header_footer(self, canv: canvas.Canvas, doc):
         """Draw properly placed header logo and footer website for MAS PDF."""
         page_width, page_height = doc.pagesize
-        gold = colors.HexColor('#d4af37')
-        dark = colors.HexColor('#1a365d')
+        gold = HEADER_GOLD
+        dark = FOOTER_DARK
 
         # Logo centered in header with proper spacing
-        logo_path = self._get_logo_path()
-        if logo_path and os.path.exists(logo_path):
+        if self._logo_path:
             try:
                 w = 140  # Increased width
                 h = 50   # Increased height for full logo visibility
                 x = (page_width - w) / 2  # Center horizontally
                 y = page_height - 60  # More space from top
-                canv.drawImage(logo_path, x, y, width=w, height=h, preserveAspectRatio=True, mask='auto')
+                # A filename is embedded once per document and reused by name; an
+                # ImageReader would be re-hashed on every page
+                canv.drawImage(self._logo_path, x, y, width=w, height=h, preserveAspectRatio=True, mask='auto')
             except Exception:
                 pass
 
@@ -138,6 +398,9 @@ class MASGenerator:
         if not items:
             raise Exception('No items found in the table. Please check your data.')
         
+        # Fetch remote logos/images for all pages concurrently instead of one by one
+        self._prefetch_images(items)
+        
         # Create output directory
         output_dir = os.path.join('outputs', session_id, 'mas')
         os.makedirs(output_dir, exist_ok=True)
@@ -149,39 +412,64 @@ class MASGenerator:
                                 topMargin=0.9*inch, bottomMargin=0.7*inch,
                                 leftMargin=0.6*inch, rightMargin=0.6*inch)
         story = []
+        total_items = len(items)
         
-        # Create MAS page for each item
-        for idx, item in enumerate(items):
-            if idx > 0:
-                story.append(PageBreak())
-            story.extend(self.create_mas_page(item, idx + 1, len(items)))
-        
-        # Build PDF
         try:
+            # Create MAS page for each item - built concurrently, assembled in order
+            if total_items > 1:
+                with ThreadPoolExecutor(max_workers=min(MAS_PAGE_WORKERS, total_items)) as executor:
+                    pages = list(executor.map(
+                        lambda numbered: self.create_mas_page(numbered[1], numbered[0] + 1, total_items),
+                        enumerate(items)))
+            else:
+                pages = [self.create_mas_page(items[0], 1, 1)]
+            
+            for idx, page in enumerate(pages):
+                if idx > 0:
+                    story.append(PageBreak())
+                story.extend(page)
+            
+            # Build PDF
             doc.build(story, onFirstPage=self._draw_header_footer, onLaterPages=self._draw_header_footer)
         finally:
-            # Clean up temporary image files
-            for f in self.temp_files:
-                try:
-                    if os.path.exists(f):
-                        os.remove(f)
-                except:
-                    pass
-            self.temp_files = []
+            self._logo_image_cache = {}
+            self._para_cache = {}
         
         return output_file
     
+    def _prefetch_images(self, items):
+        """Download every remote image the MAS pages will use into the download cache"""
+        urls = []
+        for item in items:
+            candidates = [item.brand_logo]
+            if item.is_multibudget:
+                candidates.append(item.reference_image_path)
+            candidates.extend((item.image_paths or [item.image_path])[:9])
+            for url in candidates:
+                if isinstance(url, str) and url.startswith('http') and url not in self._download_cache:
+                    urls.append(url)
+        
+        if urls:
+            self._download_cache.update(download_images(urls))
+    
     def parse_items_from_costed_data(self, costed_data, session, file_id, is_multibudget=False,
                                      product_selections=None, tier=None):
         """Parse items from costed data"""
         items = []
         session_id = costed_data.get('session_id', session.get('session_id', ''))
         product_selections = product_selections or []
+        # row_index -> selection (first one wins, matching the previous linear scan)
+        sel_by_idx = {}
+        for p in product_selections:
+            sel_by_idx.setdefault(p.get('row_index'), p)
+        # Row key -> column classification, computed once per distinct header
+        header_kinds = {}
         
         for table in costed_data.get('tables', []):
             # Normalize headers
             raw_headers = table.get('headers', [])
             headers = [str(h).lower().strip() for h in raw_headers]
+            has_brand_image_col = any('brand image' in h for h in headers)
             
             for row_idx, row in enumerate(table.get('rows', [])):
                 description = ''
@@ -189,48 +477,51 @@ class MASGenerator:
                 unit = ''
                 description_found = False
                 
+                row_cells = []
+                for header, cell_value in row.items():
+                    kind = header_kinds.get(header)
+                    if kind is None:
+                        kind = header_kinds[header] = self._classify_costed_header(header)
+                    row_cells.append((kind, cell_value))
+                
                 # PRIORITY 1: For multi-budget, check for Brand Description
                 if is_multibudget:
-                    for header, cell_value in row.items():
-                        h_str = str(header).lower().strip()
-                        if 'brand description' in h_str or h_str == 'brand description':
+                    for kind, cell_value in row_cells:
+                        if kind['brand_description']:
                             val = str(cell_value) if cell_value else ''
-                            description = re.sub(r'<[^>]+>', ' ', val).strip()
-                            description = re.sub(r'\s+', ' ', description)
+                            description = _clean_cell_text(val)
                             if description and 'no description' not in description.lower():
                                 description_found = True
                                 break
                 
                 # Priority 2: Regular Description column
                 if not description_found:
-                    for header, cell_value in row.items():
-                        h_str = str(header).lower().strip()
-                        if ('descript' in h_str or 'discript' in h_str) and 'brand' not in h_str:
+                    for kind, cell_value in row_cells:
+                        if kind['description']:
                             val = str(cell_value) if cell_value else ''
-                            description = re.sub(r'<[^>]+>', ' ', val).strip()
-                            description = re.sub(r'\s+', ' ', description)
+                            description = _clean_cell_text(val)
                             description_found = True
                             break
                             
                 # Priority 3: Item/Product columns
                 if not description_found:
-                    for header, cell_value in row.items():
-                        h_str = str(header).lower().strip()
-                        if 'item' in h_str or 'product' in h_str:
+                    for kind, cell_value in row_cells:
+                        if kind['item']:
                             val = str(cell_value) if cell_value else ''
-                            description = re.sub(r'<[^>]+>', ' ', val).strip()
-                            description = re.sub(r'\s+', ' ', description)
+                            description = _clean_cell_text(val)
                             break
                             
                 # Extract other fields
-                for header, cell_value in row.items():
-                    h_str = str(header).lower().strip()
+                for kind, cell_value in row_cells:
+                    field = kind['field']
+                    if field is None:
+                        continue
                     val = str(cell_value) if cell_value else ''
-                    clean_val = re.sub(r'<[^>]+>', '', val).strip()
+                    clean_val = HTML_TAG_RE.sub('', val).strip() if '<' in val else val.strip()
                     
-                    if 'qty' in h_str or 'quantity' in h_str:
+                    if field == 'qty':
                         qty = clean_val
-                    elif 'unit' in h_str and 'rate' not in h_str:
+                    else:
                         unit = clean_val
 
                 # Extract Images
@@ -238,45 +529,41 @@ class MASGenerator:
                 reference_image_paths = []
                 selected_product_image = None
                 
-                has_brand_image_col = any('brand image' in h for h in headers)
-                
-                for header, cell_value in row.items():
-                    h_str = str(header).lower().strip()
-                    val = str(cell_value) if cell_value else ''
+                for kind, cell_value in row_cells:
+                    if is_multibudget:
+                        if kind['image'] is None:
+                            continue
+                        # A later reference image can no longer change the selection
+                        if kind['image'] == 'reference' and selected_product_image and not has_brand_image_col:
+                            continue
+                    if not cell_value:
+                        continue
+                    val = cell_value if isinstance(cell_value, str) else str(cell_value)
+                    if '<img' not in val:
+                        continue
+                    
+                    paths = self.extract_all_image_paths(val, session_id, file_id)
+                    if not paths:
+                        continue
                     
+                    # Multi-budget pages only show the selected image, so image_paths stays unused there
                     if is_multibudget:
                         # Brand Image priority
-                        if 'brand image' in h_str or h_str == 'brand image':
-                            if '<img' in val:
-                                paths = self.extract_all_image_paths(val, session_id, file_id)
-                                if paths:
-                                    selected_product_image = paths[0]
-                                    image_paths.extend(paths)
+                        if kind['image'] == 'brand':
+                            selected_product_image = paths[0]
                         # Reference/Indicative image
-                        elif (('indicative' in h_str and 'image' in h_str) or 
-                              ('image' in h_str and 'brand' not in h_str and 'product' not in h_str) or
-                              ('img' in h_str and 'brand' not in h_str)):
-                            if '<img' in val:
-                                paths = self.extract_all_image_paths(val, session_id, file_id)
-                                if paths:
-                                    if has_brand_image_col:
-                                        reference_image_paths.extend(paths)
-                                    else:
-                                        if not selected_product_image:
-                                            selected_product_image = paths[0]
-                                        image_paths.extend(paths)
+                        elif has_brand_image_col:
+                            reference_image_paths.extend(paths)
+                        else:
+                            selected_product_image = paths[0]
                     else:
                         # Regular mode
-                        if '<img' in val:
-                            paths = self.extract_all_image_paths(val, session_id, file_id)
-                            if paths:
-                                image_paths.extend(paths)
+                        image_paths.extend(paths)
                 
                 # Final image selection
                 if is_multibudget and selected_product_image:
                     if selected_product_image.startswith('http'):
-                        from utils.image_helper import download_image
-                        path = download_image(selected_product_image)
+                        path = self._download_image(selected_product_image)
                         if path: selected_product_image = path
                         
                 final_description = description
@@ -288,8 +575,8 @@ class MASGenerator:
                     brand_logo = row.get('brand_logo')
                     
                     # Check product_selections for brand info
-                    if is_multibudget and product_selections:
-                        selection = next((p for p in product_selections if p.get('row_index') == row_idx), None)
+                    if is_multibudget and sel_by_idx:
+                        selection = sel_by_idx.get(row_idx)
                         if selection:
                             if not brand:
                                 brand = selection.get('brand')
@@ -304,25 +591,51 @@ class MASGenerator:
                     if not brand_logo and brand:
                         brand_logo = self._get_brand_logo(brand)
                     
-                    item = {
-                        'description': final_description,
-                        'qty': qty,
-                        'unit': unit,
-                        'brand': brand,
-                        'brand_logo': brand_logo,
-                        'specifications': self.extract_specifications(final_description),
-                        'image_path': final_image_paths[0] if final_image_paths else None,
-                        'image_paths': final_image_paths,
-                        'reference_image_path': reference_image_paths[0] if reference_image_paths else None,
-                        'reference_image_paths': reference_image_paths,
-                        'is_multibudget': is_multibudget,
-                        'finish': 'As per manufacturer standard',
-                        'warranty': '5 Years'
-                    }
+                    item = MASItem(
+                        description=final_description,
+                        qty=qty,
+                        unit=unit,
+                        brand=brand,
+                        brand_logo=brand_logo,
+                        specifications=self.extract_specifications(final_description),
+                        image_path=final_image_paths[0] if final_image_paths else None,
+                        image_paths=final_image_paths,
+                        reference_image_path=reference_image_paths[0] if reference_image_paths else None,
+                        reference_image_paths=reference_image_paths,
+                        is_multibudget=is_multibudget,
+                        finish='As per manufacturer standard',
+                        warranty='5 Years'
+                    )
                     items.append(item)
         
         return items
     
+    def _classify_costed_header(self, header):
+        """Classify a costed-data column header for parse_items_from_costed_data"""
+        h_str = str(header).lower().strip()
+        
+        field = None
+        if 'qty' in h_str or 'quantity' in h_str:
+            field = 'qty'
+        elif 'unit' in h_str and 'rate' not in h_str:
+            field = 'unit'
+        
+        image = None
+        if 'brand image' in h_str:
+            image = 'brand'
+        elif (('indicative' in h_str and 'image' in h_str) or
+              ('image' in h_str and 'brand' not in h_str and 'product' not in h_str) or
+              ('img' in h_str and 'brand' not in h_str)):
+            image = 'reference'
+        
+        return {
+            'brand_description': 'brand description' in h_str,
+            'description': ('descript' in h_str or 'discript' in h_str) and 'brand' not in h_str,
+            'item': 'item' in h_str or 'product' in h_str,
+            'field': field,
+            'image': image
+        }
+    
     def parse_items_from_stitched_table(self, stitched_table, session, file_id, is_multibudget=False,
                                          product_selections=None, tier=None):
         """Parse items from stitched HTML table data"""
@@ -331,7 +644,7 @@ class MASGenerator:
         
         # Parse the HTML
         html_content = stitched_table.get('html', '')
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, HTML_PARSER)
         
         # Find the table
         table = soup.find('table')
@@ -351,6 +664,7 @@ class MASGenerator:
         
         # Get data rows
         rows = table.find_all('tr')[1:]
+        has_brand_image_col = any('brand image' in h for h in headers)
         
         for row_idx, row in enumerate(rows):
             cells = row.find_all('td')
@@ -400,51 +714,54 @@ class MASGenerator:
             image_paths = []
             reference_image_paths = []
             selected_product_image = None
-            has_brand_image_col = any('brand image' in h for h in headers)
             
             for h in headers:
                 val = row_data.get(h, '')
-                if not val or '<img' not in str(val):
+                if not val:
+                    continue
+                if not isinstance(val, str):
+                    val = str(val)
+                if '<img' not in val:
                     continue
                     
                 if is_multibudget:
                     if 'brand image' in h or h == 'brand image':
-                        paths = self.extract_all_image_paths(str(val), session_id, file_id)
+                        paths = self.extract_all_image_paths(val, session_id, file_id)
                         if paths: 
                             selected_product_image = paths[0]
-                            image_paths.extend(paths)
                     elif (('indicative' in h and 'image' in h) or ('image' in h and 'brand' not in h)):
-                        paths = self.extract_all_image_paths(str(val), session_id, file_id)
+                        # Only the selected image is shown, so skip once one is chosen
+                        if selected_product_image and not has_brand_image_col:
+                            continue
+                        paths = self.extract_all_image_paths(val, session_id, file_id)
                         if paths:
                             if has_brand_image_col:
                                 reference_image_paths.extend(paths)
                             else:
-                                if not selected_product_image:
-                                    selected_product_image = paths[0]
-                                image_paths.extend(paths)
+                                selected_product_image = paths[0]
                 else:
                     if 'image' in h or 'img' in h:
-                        paths = self.extract_all_image_paths(str(val), session_id, file_id)
+                        paths = self.extract_all_image_paths(val, session_id, file_id)
                         if paths: image_paths.extend(paths)
             
             final_image_paths = [selected_product_image] if (is_multibudget and selected_product_image) else (image_paths if image_paths else [])
             
             brand = self.extract_brand(description)
-            item = {
-                'description': description,
-                'qty': qty,
-                'unit': unit,
-                'brand': brand,
-                'brand_logo': self._get_brand_logo(brand),
-                'specifications': self.extract_specifications(description),
-                'image_path': final_image_paths[0] if final_image_paths else None,
-                'image_paths': final_image_paths,
-                'reference_image_path': reference_image_paths[0] if reference_image_paths else None,
-                'reference_image_paths': reference_image_paths,
-                'is_multibudget': is_multibudget,
-                'finish': 'As per manufacturer standard',
-                'warranty': '5 Years'
-            }
+            item = MASItem(
+                description=description,
+                qty=qty,
+                unit=unit,
+                brand=brand,
+                brand_logo=self._get_brand_logo(brand),
+                specifications=self.extract_specifications(description),
+                image_path=final_image_paths[0] if final_image_paths else None,
+                image_paths=final_image_paths,
+                reference_image_path=reference_image_paths[0] if reference_image_paths else None,
+                reference_image_paths=reference_image_paths,
+                is_multibudget=is_multibudget,
+                finish='As per manufacturer standard',
+                warranty='5 Years'
+            )
             items.append(item)
             
         return items
@@ -472,23 +789,23 @@ class MASGenerator:
                 # Get first image if available
                 image_path = None
                 if images:
-                    first_img = list(images.values())[0]
+                    first_img = next(iter(images.values()))
                     # Ensure first_img is a string, not a list
                     if isinstance(first_img, (list, tuple)):
                         first_img = first_img[0] if first_img else ''
                     if isinstance(first_img, str) and first_img:
                         image_path = os.path.join('outputs', session_id, file_id, first_img)
                 
-                item = {
-                    'description': description,
-                    'qty': qty,
-                    'unit': unit,
-                    'brand': brand,
-                    'specifications': specifications,
-                    'image_path': image_path,
-                    'finish': 'As per manufacturer standard',
-                    'warranty': '5 Years'
-                }
+                item = MASItem(
+                    description=description,
+                    qty=qty,
+                    unit=unit,
+                    brand=brand,
+                    specifications=specifications,
+                    image_path=image_path,
+                    finish='As per manufacturer standard',
+                    warranty='5 Years'
+                )
                 items.append(item)
         
         return items
@@ -502,23 +819,13 @@ class MASGenerator:
             ['Material Approval Sheet', f'Item {item_num} of {total_items}']
         ]
         header_table = Table(header_data, colWidths=[5.5*inch, 1.5*inch])
-        header_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (0, 0), 14),
-            ('FONTNAME', (1, 0), (1, 0), 'Helvetica'),
-            ('FONTSIZE', (1, 0), (1, 0), 9),
-            ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
+        header_table.setStyle(self.header_table_style)
         story.append(header_table)
         
         # Horizontal line
         line_data = [['']]
         line_table = Table(line_data, colWidths=[7*inch])
-        line_table.setStyle(TableStyle([
-            ('LINEBELOW', (0, 0), (-1, -1), 2, colors.HexColor('#d4af37')),
-        ]))
+        line_table.setStyle(self.line_table_style)
         story.append(line_table)
         story.append(Spacer(1, 0.08*inch))  # Reduced from 0.15
         
@@ -528,187 +835,116 @@ class MASGenerator:
             ['Date:', datetime.now().strftime('%d/%m/%Y'), 'Rev:', '00'],
         ]
         project_table = Table(project_data, colWidths=[1*inch, 3*inch, 0.8*inch, 2.2*inch])
-        project_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f0f0')),
-            ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#f0f0f0')),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 4),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-            ('TOPPADDING', (0, 0), (-1, -1), 4),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-        ]))
+        project_table.setStyle(self.project_table_style)
         story.append(project_table)
         story.append(Spacer(1, 0.08*inch))  # Reduced from 0.15
         
         # Item details section
-        details_title = Paragraph('<b>ITEM DETAILS</b>', self.header_style)
+        details_title = self._paragraph('<b>ITEM DETAILS</b>', self.header_style)
         story.append(details_title)
         story.append(Spacer(1, 0.05*inch))  # Reduced from 0.08
         
-        # Limit description length to fit on one page
-        description_text = item.get('description', 'N/A')
-        if len(description_text) > 400:
-            description_text = description_text[:397] + '...'
+        # Truncated once when the item is built
+        description_text = item.description_display
         
-        # Smaller font for compact layout
-        desc_style = ParagraphStyle('DescCompact', parent=self.normal_style, fontSize=7, leading=8)
+        # Short plain-text descriptions fit on one line, so skip the Paragraph layout
+        if ('<' not in description_text and '&' not in description_text and '\n' not in description_text
+                and stringWidth(description_text, 'Helvetica', DESC_FONT_SIZE) <= DESC_CELL_WIDTH):
+            desc_cell = description_text
+        else:
+            desc_cell = Paragraph(description_text, self.desc_style)
         
         details_data = [
-            ['Description:', Paragraph(description_text, desc_style)],
-            ['Brand:', item.get('brand', 'To be specified')],
-            ['Quantity:', f"{item.get('qty', 'N/A')} {item.get('unit', '')}"],
-            ['Finish:', item.get('finish', 'As per manufacturer standard')],
-            ['Warranty:', item.get('warranty', '5 Years')],
+            ['Description:', desc_cell],
+            ['Brand:', item.brand],
+            ['Quantity:', f"{item.qty} {item.unit}"],
+            ['Finish:', item.finish],
+            ['Warranty:', item.warranty],
         ]
         
         details_table = Table(details_data, colWidths=[1.3*inch, 5.7*inch])
-        details_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f8f9fa')),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 4),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-            ('TOPPADDING', (0, 0), (-1, -1), 3),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-        ]))
+        details_table.setStyle(self.details_table_style)
         story.append(details_table)
         story.append(Spacer(1, 0.08*inch))  # Reduced from 0.15
         
         # For multi-budget: Add small reference image on the right side below item details table
-        is_multibudget = item.get('is_multibudget', False)
-        reference_image_path = item.get('reference_image_path')
+        is_multibudget = item.is_multibudget
+        reference_image_path = item.reference_image_path
         if is_multibudget and reference_image_path:
             try:
                 # Download if URL
                 if reference_image_path.startswith('http'):
-                    from utils.image_helper import download_image
-                    cached_path = download_image(reference_image_path)
+                    cached_path = self._download_image(reference_image_path)
                     if cached_path:
                         reference_image_path = cached_path
                 
                 if reference_image_path and os.path.exists(reference_image_path):
                     # Small reference image on the right side with label below
                     ref_img = RLImage(reference_image_path, width=0.8*inch, height=0.6*inch)
-                    ref_label = Paragraph("Reference Image", ParagraphStyle('RefLabel', fontSize=7, textColor=colors.grey, alignment=2))  # alignment=2 is RIGHT
+                    ref_label = self._paragraph("Reference Image", self.ref_label_style)
                     # Create a table with empty left column and reference image on right
                     ref_table = Table([['', ref_img], ['', ref_label]], colWidths=[5.0*inch, 0.8*inch])
-                    ref_table.setStyle(TableStyle([
-                        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-                        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                    ]))
+                    ref_table.setStyle(self.ref_table_style)
                     story.append(ref_table)
                     story.append(Spacer(1, 0.05*inch))
             except Exception as e:
                 logger.warning(f"Could not add reference image to MAS: {e}")
         
         # Brand logo section - display logo above product images
-        brand_logo = item.get('brand_logo')
+        brand_logo = item.brand_logo
         if brand_logo:
             try:
                 # Download if URL
                 if brand_logo.startswith('http'):
-                    from utils.image_helper import download_image
-                    cached_logo = download_image(brand_logo)
+                    cached_logo = self._download_image(brand_logo)
                     if cached_logo and os.path.exists(cached_logo):
                         brand_logo = cached_logo
                 
                 if brand_logo and os.path.exists(brand_logo):
                     try:
-                        from PIL import Image as PILImage
-                        import tempfile
-                        # Load image and convert to PNG for compatibility
-                        with PILImage.open(brand_logo) as pil_img:
-                            img_width, img_height = pil_img.size
-                            aspect_ratio = img_height / img_width
-                            
-                            # Logo dimensions: max width 1.8 inches
-                            logo_width = 1.8 * inch
-                            logo_height = logo_width * aspect_ratio
-                            
-                            # Cap max height
-                            if logo_height > 0.75 * inch:
-                                logo_height = 0.75 * inch
-                                logo_width = logo_height / aspect_ratio
-                            
-                            # Save to temp PNG - Handle transparency properly
-                            tmp = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-                            
-                            # Check if image has transparency (RGBA or palette with transparency)
-                            if pil_img.mode in ('RGBA', 'LA') or (pil_img.mode == 'P' and 'transparency' in pil_img.info):
-                                # Create white background and paste logo on it
-                                background = PILImage.new('RGB', pil_img.size, (255, 255, 255))
-                                if pil_img.mode == 'P':
-                                    pil_img = pil_img.convert('RGBA')
-                                background.paste(pil_img, mask=pil_img.split()[-1])  # Use alpha channel as mask
-                                background.save(tmp.name, 'PNG')
-                            else:
-                                pil_img.convert('RGB').save(tmp.name, 'PNG')
-                            
-                            self.temp_files.append(tmp.name)
-                            
-                            # Create logo image
-                            logo_img = RLImage(tmp.name, width=logo_width, height=logo_height)
-                            logo_img.hAlign = 'CENTER'
-                            
-                            # Add logo with small spacer
-                            story.append(logo_img)
-                            story.append(Spacer(1, 0.08*inch))
+                        logo_file, logo_width, logo_height = self._prepare_brand_logo(brand_logo)
+                        if isinstance(logo_file, bytes):
+                            # Each flowable reads its own stream
+                            logo_file = BytesIO(logo_file)
+                        
+                        # Create logo image
+                        logo_img = RLImage(logo_file, width=logo_width, height=logo_height)
+                        logo_img.hAlign = 'CENTER'
+                        
+                        # Add logo with small spacer
+                        story.append(logo_img)
+                        story.append(Spacer(1, 0.08*inch))
                     except Exception as e:
                         logger.warning(f"Could not process brand logo image: {e}")
             except Exception as e:
                 logger.warning(f"Could not add brand logo to MAS: {e}")
         
         # Product image section - support multiple images in grid
-        image_title = Paragraph('<b>PRODUCT IMAGE(S)</b>', self.header_style)
+        image_title = self._paragraph('<b>PRODUCT IMAGE(S)</b>', self.header_style)
         story.append(image_title)
         story.append(Spacer(1, 0.05*inch))
         
-        image_paths = item.get('image_paths', [])
-        if not image_paths and item.get('image_path'):
-            image_paths = [item.get('image_path')]
+        image_paths = item.image_paths
+        if not image_paths and item.image_path:
+            image_paths = [item.image_path]
             
-        valid_images = []
-        if image_paths:
-            from PIL import Image as PILImage
-            import tempfile
-            
-            for img_path in image_paths[:9]:
-                if not img_path: continue
-                
-                # Download if URL
-                if str(img_path).startswith('http'):
-                    from utils.image_helper import download_image
-                    cached = download_image(img_path)
-                    if cached: img_path = cached
-                
-                if img_path and os.path.exists(img_path):
-                    try:
-                        # Convert to PNG for ReportLab (handles WEBP, etc.)
-                        with PILImage.open(img_path) as pil_img:
-                            tmp = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-                            pil_img.convert('RGB').save(tmp.name, 'PNG')
-                            valid_images.append(tmp.name)
-                            self.temp_files.append(tmp.name)
-                    except Exception as e:
-                        logger.warning(f"Failed to convert image {img_path}: {e}")
-                        # Fallback to original if conversion fails
-                        valid_images.append(img_path)
+        image_paths = [p for p in image_paths[:9] if p]
+        if len(image_paths) > 1:
+            # Download/decode/convert concurrently, keeping the original order
+            with ThreadPoolExecutor(max_workers=min(MAS_IMAGE_WORKERS, len(image_paths))) as executor:
+                prepared = list(executor.map(self._prepare_product_image, image_paths))
+        else:
+            prepared = [self._prepare_product_image(p) for p in image_paths]
+        valid_images = [entry for entry in prepared if entry]
         
         num_images = len(valid_images)
         if num_images > 0:
             if num_images == 1:
                 # Single large image
                 try:
-                    from PIL import Image as PILImage
-                    pil_img = PILImage.open(valid_images[0])
-                    img_width, img_height = pil_img.size
+                    img_path, img_width, img_height = valid_images[0]
+                    if img_width is None:
+                        img_width, img_height = self._image_size(img_path)
                     aspect_ratio = img_height / img_width
                     target_width = 3.5 * inch  # Large single image
                     target_height = target_width * aspect_ratio
@@ -716,7 +952,7 @@ class MASGenerator:
                     if target_height > 3.0 * inch:
                         target_height = 3.0 * inch
                         target_width = target_height / aspect_ratio
-                    img = RLImage(valid_images[0], width=target_width, height=target_height)
+                    img = RLImage(img_path, width=target_width, height=target_height)
                     img.hAlign = 'CENTER'
                     story.append(img)
                 except Exception as e:
@@ -725,7 +961,6 @@ class MASGenerator:
             else:
                 # multiple images
                 try:
-                    from PIL import Image as PILImage
                     image_elements = []
                     
                     # Determine columns based on image count
@@ -740,9 +975,9 @@ class MASGenerator:
                         max_img_width = 2.1 * inch
                         max_img_height = 1.6 * inch # Reduce height for 3 rows to fit page
                     
-                    for img_path in valid_images:
-                        pil_img = PILImage.open(img_path)
-                        img_width, img_height = pil_img.size
+                    for img_path, img_width, img_height in valid_images:
+                        if img_width is None:
+                            img_width, img_height = self._image_size(img_path)
                         aspect_ratio = img_height / img_width
                         
                         target_width = max_img_width
@@ -756,31 +991,13 @@ class MASGenerator:
                         img_elem = RLImage(img_path, width=target_width, height=target_height)
                         image_elements.append(img_elem)
                     
-                    # Create grid rows
-                    img_table_data = []
-                    current_row = []
-                    for i, img in enumerate(image_elements):
-                        current_row.append(img)
-                        if len(current_row) == cols:
-                            img_table_data.append(current_row)
-                            current_row = []
-                    
-                    # Fill last row with empty strings if not full
-                    if current_row:
-                        while len(current_row) < cols:
-                            current_row.append('')
-                        img_table_data.append(current_row)
+                    # Create grid rows - last row padded with empty strings
+                    padded = image_elements + [''] * (-len(image_elements) % cols)
+                    img_table_data = [padded[i:i + cols] for i in range(0, len(padded), cols)]
                     
                     # Create table
                     img_table = Table(img_table_data, colWidths=[col_width] * cols)
-                    img_table.setStyle(TableStyle([
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 1),
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 1),
-                        ('TOPPADDING', (0, 0), (-1, -1), 2),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-                    ]))
+                    img_table.setStyle(self.image_grid_table_style)
                     story.append(img_table)
                 except Exception as e:
                     logger.error(f"Failed to create image grid: {e}")
@@ -788,25 +1005,25 @@ class MASGenerator:
         story.append(Spacer(1, 0.08*inch))  # Reduced from 0.15
         
         # Technical specifications - compact
-        spec_title = Paragraph('<b>SPECIFICATIONS</b>', self.header_style)
+        spec_title = self._paragraph('<b>SPECIFICATIONS</b>', self.header_style)
         story.append(spec_title)
         story.append(Spacer(1, 0.04*inch))  # Reduced from 0.06
         
-        specifications = item.get('specifications', [])
+        specifications = item.specifications
         if specifications:
             # Limit to 3 specs to fit on page (reduced from 4)
             specs_to_show = specifications[:3]
             spec_text = '<br/>'.join([f'• {spec}' for spec in specs_to_show])
-            spec_para = Paragraph(spec_text, ParagraphStyle('SpecCompact', parent=self.normal_style, fontSize=7, leading=8))
+            spec_para = self._paragraph(spec_text, self.spec_style)
             story.append(spec_para)
         else:
             compact_specs = '• As per manufacturer standard specifications<br/>• Comply with relevant standards'
-            story.append(Paragraph(compact_specs, ParagraphStyle('SpecCompact', parent=self.normal_style, fontSize=7, leading=8)))
+            story.append(self._paragraph(compact_specs, self.spec_style))
         
         story.append(Spacer(1, 0.08*inch))  # Reduced from 0.15
         
         # Approval section - more compact
-        approval_title = Paragraph('<b>APPROVAL</b>', self.header_style)
+        approval_title = self._paragraph('<b>APPROVAL</b>', self.header_style)
         story.append(approval_title)
         story.append(Spacer(1, 0.04*inch))  # Reduced from 0.06
         
@@ -818,35 +1035,171 @@ class MASGenerator:
         ]
         
         approval_table = Table(approval_data, colWidths=[1.2*inch, 2.5*inch, 0.7*inch, 2.6*inch])
-        approval_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, 2), (0, 2), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 0), (2, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (2, 2), (2, 2), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 7),  # Reduced from 8
-            ('LINEBELOW', (1, 1), (1, 1), 1, colors.black),
-            ('LINEBELOW', (3, 1), (3, 1), 1, colors.black),
-            ('LINEBELOW', (1, 3), (1, 3), 1, colors.black),
-            ('LINEBELOW', (3, 3), (3, 3), 1, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('TOPPADDING', (0, 0), (-1, -1), 2),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-        ]))
+        approval_table.setStyle(self.approval_table_style)
         story.append(approval_table)
         story.append(Spacer(1, 0.06*inch))  # Reduced from 0.1
         
         # Remarks - compact with smaller font
-        remarks = Paragraph('<b>Remarks:</b> _______________________________________________', ParagraphStyle('RemarksCompact', parent=self.normal_style, fontSize=7))
+        remarks = self._paragraph('<b>Remarks:</b> _______________________________________________', self.remarks_style)
         story.append(remarks)
         
         return story
     
+    def _paragraph(self, text, style):
+        """Paragraph for text that repeats across pages (headings, stock specs), parsed once"""
+        key = (text, style.name)
+        para = self._para_cache.get(key)
+        if para is None:
+            para = self._para_cache[key] = Paragraph(text, style)
+        return para
+    
+    def _prepare_product_image(self, img_path):
+        """
+        Make a product image usable by ReportLab (once per source for this generator)
+        
+        Returns:
+            Tuple of (path, width, height) - size is None when the image could not be
+            decoded - or None when the image is unavailable
+        """
+        if img_path in self._product_image_cache:
+            return self._product_image_cache[img_path]
+        result = self._product_image_cache[img_path] = self._load_product_image(img_path)
+        return result
+    
+    def _load_product_image(self, img_path):
+        """Download/convert a product image for _prepare_product_image"""
+        # Download if URL
+        if str(img_path).startswith('http'):
+            cached = self._download_image(img_path)
+            if cached: img_path = cached
+        
+        if not (img_path and os.path.exists(img_path)):
+            return None
+        
+        try:
+            # Convert to JPEG for ReportLab (handles WEBP, etc.)
+            # Keep the decoded size so the layout needn't reopen the file
+            with PILImage.open(img_path) as pil_img:
+                # Opaque JPEG/PNG is embedded by ReportLab as-is - only transcode the rest
+                if pil_img.format in ('JPEG', 'PNG') and pil_img.mode in ('RGB', 'L'):
+                    return (img_path, pil_img.width, pil_img.height)
+                
+                # Layout only needs the aspect ratio, so report the source size
+                width, height = pil_img.size
+                
+                # Converted copies are keyed by source content, so repeats skip the transcode
+                with open(img_path, 'rb') as f:
+                    digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+                jpeg_path = os.path.join(MAS_IMAGE_CACHE_DIR, f'{digest}_{MAS_IMAGE_MAX_PX}.jpg')
+                try:
+                    # Mark the copy as used, so prune_mas_image_cache keeps it for this build
+                    os.utime(jpeg_path)
+                except FileNotFoundError:
+                    os.makedirs(MAS_IMAGE_CACHE_DIR, exist_ok=True)
+                    tmp_path = f'{jpeg_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+                    try:
+                        # Never decode more pixels than the page can show (JPEG decodes at 1/2..1/8 scale)
+                        pil_img.draft('RGB', (MAS_IMAGE_MAX_PX, MAS_IMAGE_MAX_PX))
+                        pil_img.thumbnail((MAS_IMAGE_MAX_PX, MAS_IMAGE_MAX_PX), PILImage.LANCZOS)
+                        # JPEG is embedded by ReportLab as-is (DCT), unlike PNG/WEBP which it re-encodes
+                        pil_img.convert('RGB').save(tmp_path, 'JPEG', quality=MAS_IMAGE_JPEG_QUALITY)
+                        os.replace(tmp_path, jpeg_path)
+                    except Exception:
+                        if os.path.exists(tmp_path):
+                            os.remove(tmp_path)
+                        raise
+                return (jpeg_path, width, height)
+        except Exception as e:
+            logger.warning(f"Failed to convert image {img_path}: {e}")
+            # Fallback to original if conversion fails (size read at layout time)
+            return (img_path, None, None)
+    
+    def _path_listed(self, path):
+        """os.path.exists via one cached scandir per directory (extracted images don't move mid-build)"""
+        dir_path, name = os.path.split(path)
+        names = self._dir_listing_cache.get(dir_path)
+        if names is None:
+            try:
+                with os.scandir(dir_path or '.') as entries:
+                    names = {entry.name for entry in entries}
+            except OSError:
+                names = set()
+            self._dir_listing_cache[dir_path] = names
+        return name in names
+    
+    def _image_size(self, img_path):
+        """Pixel size of an image file"""
+        with PILImage.open(img_path) as pil_img:
+            return pil_img.size
+    
+    def _prepare_brand_logo(self, logo_path):
+        """
+        Convert a brand logo to an opaque PNG sized for the MAS page
+        
+        Items sharing a brand reuse the conversion (cached per path and mtime for
+        the current build). Converted logos stay in memory - no temp files.
+        
+        Returns:
+            Tuple of (path or PNG bytes, logo_width, logo_height)
+        """
+        key = (os.path.abspath(logo_path), os.stat(logo_path).st_mtime_ns)
+        cached = self._logo_image_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # Load image and convert to PNG for compatibility
+        with PILImage.open(logo_path) as pil_img:
+            img_width, img_height = pil_img.size
+            aspect_ratio = img_height / img_width
+            
+            # Logo dimensions: max width 1.8 inches
+            logo_width = 1.8 * inch
+            logo_height = logo_width * aspect_ratio
+            
+            # Cap max height
+            if logo_height > 0.75 * inch:
+                logo_height = 0.75 * inch
+                logo_width = logo_height / aspect_ratio
+            
+            # Opaque RGB PNG/JPEG can go to ReportLab as-is - no re-encode needed
+            if pil_img.mode == 'RGB' and pil_img.format in ('PNG', 'JPEG'):
+                result = (logo_path, logo_width, logo_height)
+                self._logo_image_cache[key] = result
+                return result
+            
+            # Encode to an in-memory PNG - Handle transparency properly
+            buf = BytesIO()
+            
+            # Check if image has transparency (RGBA or palette with transparency)
+            if pil_img.mode in ('RGBA', 'LA') or (pil_img.mode == 'P' and 'transparency' in pil_img.info):
+                # Blend logo over a white background in a single composite
+                rgba = pil_img if pil_img.mode == 'RGBA' else pil_img.convert('RGBA')
+                background = PILImage.new('RGBA', rgba.size, (255, 255, 255, 255))
+                PILImage.alpha_composite(background, rgba).convert('RGB').save(buf, 'PNG')
+            else:
+                pil_img.convert('RGB').save(buf, 'PNG')
+        
+        result = (buf.getvalue(), logo_width, logo_height)
+        self._logo_image_cache[key] = result
+        return result
+    
     def extract_all_image_paths(self, html_content, session_id, file_id):
         """Extract ALL image paths from HTML content (supports multiple images)"""
         image_paths = []
-        matches = re.findall(r'src=["\']([^"\']+)["\']', html_content)
         
-        for src in matches:
+        # Ensure all parts are strings
+        if isinstance(session_id, (list, tuple)):
+            session_id = session_id[0] if session_id else ''
+        if isinstance(file_id, (list, tuple)):
+            file_id = file_id[0] if file_id else ''
+        
+        for match in IMG_TAG_SRC_RE.finditer(html_content):
+            src = match.group(2)
+            if not src:
+                continue
+            if '&' in src:
+                # Attribute values are HTML-escaped (e.g. &amp; in query strings)
+                src = html.unescape(src)
             # Handle URLs (http/https)
             if src.startswith('http://') or src.startswith('https://'):
                 image_paths.append(src)
@@ -861,19 +1214,12 @@ class MASGenerator:
                 image_paths.append(src)
                 continue
             
-            # Handle relative path - ensure all parts are strings
-            if isinstance(session_id, (list, tuple)):
-                session_id = session_id[0] if session_id else ''
-            if isinstance(file_id, (list, tuple)):
-                file_id = file_id[0] if file_id else ''
-            if isinstance(src, (list, tuple)):
-                src = src[0] if src else ''
-            
-            full_path = os.path.join('outputs', str(session_id), str(file_id), str(src))
-            if os.path.exists(full_path):
+            # Handle relative path
+            full_path = os.path.join('outputs', str(session_id), str(file_id), src)
+            if self._path_listed(full_path):
                 image_paths.append(full_path)
-            elif os.path.exists(str(src)):
-                image_paths.append(str(src))
+            elif os.path.exists(src):
+                image_paths.append(src)
             else:
                 image_paths.append(full_path)
         
@@ -886,7 +1232,7 @@ class MASGenerator:
         
     def _extract_image_path_old(self, html_content, session_id, file_id):
         """Original single image extraction (kept for reference)"""
-        match = re.search(r'src=["\']([^"\']+)["\']', html_content)
+        match = IMG_SRC_RE.search(html_content)
         if match:
             src = match.group(1)
             
@@ -940,39 +1286,8 @@ class MASGenerator:
     
     def extract_brand(self, description):
         """Extract brand from description"""
-        brands = ['Sedus', 'Narbutas', 'Sokoa', 'B&T', 'Herman Miller', 'Steelcase', 'Vitra', 'Knoll', 'Haworth']
-        for brand in brands:
-            if brand.lower() in description.lower():
-                return brand
-        
-        # Try to find capitalized words as potential brands
-        words = description.split()
-        for word in words:
-            if word and len(word) > 2 and word[0].isupper():
-                return word
-        
-        return 'To be specified'
+        return _extract_brand(description)
     
     def extract_specifications(self, description):
         """Extract specifications from description"""
-        specs = []
-        
-        # Try to extract key specifications from description
-        desc_lower = description.lower()
-        
-        # Material
-        if any(mat in desc_lower for mat in ['wood', 'metal', 'fabric', 'leather', 'plastic', 'steel', 'aluminum']):
-            specs.append('Material: As specified')
-        
-        # Finish
-        if any(fin in desc_lower for fin in ['polished', 'matte', 'glossy', 'powder coated', 'chrome']):
-            specs.append('Finish: As specified')
-        
-        # Always add these compact specs
-        if len(specs) < 2:
-            specs.append('Material/Finish: Per manufacturer standard')
-        
-        specs.append('Color: As per approved sample')
-        specs.append('Compliance: Meet relevant standards')
-        
-        return specs[:4]  # Limit to 4 specs maximum
+        return list(_extract_specifications(description))
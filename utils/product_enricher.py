@@ -3,23 +3,98 @@ Product Data Enrichment Utility
 Fetches and adds product images and descriptions to BOQ data
 """
 
+import json
 import logging
-from typing import Dict, List
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List
 from utils.universal_brand_scraper import UniversalBrandScraper
-from utils.image_helper import download_image
+from utils.image_helper import download_image, download_images
 import os
 
 logger = logging.getLogger(__name__)
 
+# Row fields checked (in order) for a product page URL
+URL_FIELDS = ('source_url', 'product_url', 'url', 'link', 'product_link')
+
+# Concurrent product page fetches (Selenium starts a browser per fetch, so fewer)
+ENRICH_WORKERS = 8
+SELENIUM_ENRICH_WORKERS = 2
+
+# Product details persisted across sessions/restarts, keyed by product URL
+ENRICH_CACHE_PATH = os.path.join('outputs', '.enrich_cache.sqlite3')
+ENRICH_CACHE_TTL = 7 * 24 * 3600  # seconds
+# Expired details are deleted on open and at most this often while writing
+ENRICH_CACHE_PRUNE_INTERVAL = 3600  # seconds
+
+# Most recently used product details kept in memory by the shared enricher
+ENRICH_MEMORY_ITEMS = 1024
+
+
+class ProductDetailsStore:
+    """SQLite-backed store of fetched product details with a TTL"""
+    
+    def __init__(self, path: str = ENRICH_CACHE_PATH, ttl: int = ENRICH_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS product_details '
+                '(url TEXT PRIMARY KEY, details TEXT NOT NULL, fetched_at REAL NOT NULL)'
+            )
+        self.prune()
+    
+    def get(self, url: str):
+        """(details, fetched_at) stored for url, or None when missing or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT details, fetched_at FROM product_details WHERE url = ?', (url,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0]), row[1]
+    
+    def set(self, url: str, details: Dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO product_details (url, details, fetched_at) VALUES (?, ?, ?)',
+                (url, json.dumps(details), time.time())
+            )
+        if time.time() - self._pruned_at > ENRICH_CACHE_PRUNE_INTERVAL:
+            self.prune()
+    
+    def prune(self):
+        """Delete expired details"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM product_details WHERE fetched_at < ?', (now - self.ttl,))
+        self._pruned_at = now
+
 
 class ProductEnricher:
     """Enriches product data with images and descriptions"""
     
-    def __init__(self):
+    def __init__(self, cache_path: str = ENRICH_CACHE_PATH):
         self.scraper = UniversalBrandScraper()
-        self.cache = {}  # Cache fetched product details
+        # LRU of url -> (details, fetched_at); lives as long as the process
+        self.cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Disk-backed copy of the cache; enrichment still works without it
+        try:
+            self.store = ProductDetailsStore(cache_path)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Product details cache unavailable at {cache_path}: {e}")
+            self.store = None
     
-    def enrich_boq_data(self, boq_data: Dict, session_id: str, use_selenium: bool = False) -> Dict:
+    def enrich_boq_data(self, boq_data: Dict, session_id: str, use_selenium: bool = False,
+                        prefetched: Dict[str, Dict] = None) -> Dict:
         """
         Enrich BOQ data with product images and descriptions
         
@@ -27,6 +102,8 @@ class ProductEnricher:
             boq_data: BOQ data structure with tables
             session_id: Session ID for file storage
             use_selenium: Whether to use Selenium for fetching details
+            prefetched: Details per URL from prefetch_product_details; URLs it
+                covers (failures included) are not fetched again
             
         Returns:
             Enriched BOQ data with image_url and description fields
@@ -41,78 +118,186 @@ class ProductEnricher:
         
         total_enriched = 0
         
-        for table_idx, table in enumerate(enriched_data['tables']):
+        # Pass 1: find the product URL of every row
+        url_rows = self._collect_url_rows(enriched_data)
+        
+        # Fetch all product pages concurrently, then all their images
+        fetched = dict(prefetched or {})
+        missing = [url for _, _, _, url in url_rows if url not in fetched]
+        if missing:
+            fetched.update(self.prefetch_product_details(missing, use_selenium))
+        row_details = [fetched.get(url, {}) for _, _, _, url in url_rows]
+        cached_images = download_images(details.get('image_url') for details in row_details if details)
+        
+        # Pass 2: write the fetched details into the rows
+        for (table_idx, row_idx, row, product_url), details in zip(url_rows, row_details):
+            if details:
+                # Add image
+                if details.get('image_url'):
+                    # Downloaded and cached above
+                    cached_image = cached_images.get(details['image_url'])
+                    if cached_image:
+                        row['image_path'] = cached_image
+                        row['image_url'] = details['image_url']
+                
+                # Add description
+                if details.get('description'):
+                    row['description'] = details['description']
+                
+                # Add features if available
+                if details.get('features'):
+                    row['features'] = details['features']
+                
+                # Add price if available
+                if details.get('price'):
+                    row['manufacturer_price'] = details['price']
+                
+                total_enriched += 1
+                logger.info(f"Enriched product {row_idx + 1} in table {table_idx + 1}")
+        
+        logger.info(f"Enrichment complete. Enriched {total_enriched} products.")
+        return enriched_data
+    
+    def collect_product_urls(self, boq_data_items: Iterable[Dict]) -> List[str]:
+        """
+        Product URLs of every row of several BOQ data structures, in row order
+        
+        Args:
+            boq_data_items: BOQ data structures with tables
+            
+        Returns:
+            URLs as found (duplicates kept; prefetch_product_details fetches each once)
+        """
+        return [
+            url
+            for boq_data in boq_data_items
+            for _, _, _, url in self._collect_url_rows(boq_data)
+        ]
+    
+    def _collect_url_rows(self, boq_data: Dict) -> List[tuple]:
+        """(table_idx, row_idx, row, product_url) for every BOQ row with a product URL"""
+        url_rows = []
+        for table_idx, table in enumerate(boq_data.get('tables', [])):
             if 'rows' not in table:
                 continue
             
             for row_idx, row in enumerate(table['rows']):
                 # Look for product URL or brand/model info
                 product_url = self._extract_product_url(row)
-                
                 if product_url:
-                    # Fetch product details
-                    details = self._get_product_details(product_url, use_selenium)
-                    
-                    if details:
-                        # Add image
-                        if details.get('image_url'):
-                            # Download and cache image
-                            cached_image = download_image(details['image_url'])
-                            if cached_image:
-                                row['image_path'] = cached_image
-                                row['image_url'] = details['image_url']
-                        
-                        # Add description
-                        if details.get('description'):
-                            row['description'] = details['description']
-                        
-                        # Add features if available
-                        if details.get('features'):
-                            row['features'] = details['features']
-                        
-                        # Add price if available
-                        if details.get('price'):
-                            row['manufacturer_price'] = details['price']
-                        
-                        total_enriched += 1
-                        logger.info(f"Enriched product {row_idx + 1} in table {table_idx + 1}")
-        
-        logger.info(f"Enrichment complete. Enriched {total_enriched} products.")
-        return enriched_data
+                    url_rows.append((table_idx, row_idx, row, product_url))
+        return url_rows
     
     def _extract_product_url(self, row: Dict) -> str:
         """Extract product URL from row data"""
         # Look for common URL field names
-        url_fields = ['source_url', 'product_url', 'url', 'link', 'product_link']
-        
-        for field in url_fields:
-            if field in row and row[field]:
-                url = str(row[field]).strip()
+        for field in URL_FIELDS:
+            value = row.get(field)
+            if value:
+                url = str(value).strip()
                 if url.startswith('http'):
                     return url
         
         # Look in any field that might contain a URL
-        for key, value in row.items():
-            if isinstance(value, str) and value.startswith('http'):
-                return value
+        return next((value for value in row.values() if isinstance(value, str) and value.startswith('http')), None)
+    
+    def prefetch_product_details(self, product_urls: List[str], use_selenium: bool = False) -> Dict[str, Dict]:
+        """
+        Fetch details for all uncached product URLs concurrently into the cache
         
-        return None
+        Args:
+            product_urls: Product page URLs (duplicates are fetched once)
+            use_selenium: Whether to use Selenium for fetching details
+            
+        Returns:
+            Details per URL, cached or just fetched ({} when the fetch failed)
+        """
+        results = {}
+        pending = []
+        for url in dict.fromkeys(product_urls):
+            details = self._cached_details(url)
+            if details is None:
+                pending.append(url)
+            else:
+                results[url] = details
+        if not pending:
+            return results
+        
+        workers = SELENIUM_ENRICH_WORKERS if use_selenium else ENRICH_WORKERS
+        with ThreadPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            futures = {
+                executor.submit(self.scraper.fetch_product_details, url, use_selenium): url
+                for url in pending
+            }
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    results[url] = future.result()
+                    self._remember_details(url, results[url])
+                except Exception as e:
+                    logger.error(f"Error fetching details for {url}: {e}")
+                    results[url] = {}
+        return results
     
     def _get_product_details(self, product_url: str, use_selenium: bool = False) -> Dict:
         """Get product details from cache or fetch"""
         # Check cache
-        if product_url in self.cache:
-            return self.cache[product_url]
+        details = self._cached_details(product_url)
+        if details is not None:
+            return details
         
         # Fetch details
         try:
             details = self.scraper.fetch_product_details(product_url, use_selenium)
-            self.cache[product_url] = details
+            self._remember_details(product_url, details)
             return details
         except Exception as e:
             logger.error(f"Error fetching details for {product_url}: {e}")
             return {}
     
+    def _cached_details(self, product_url: str):
+        """Details from memory, falling back to the disk store"""
+        with self._cache_lock:
+            entry = self.cache.get(product_url)
+            if entry is not None:
+                details, fetched_at = entry
+                if time.time() - fetched_at <= ENRICH_CACHE_TTL:
+                    self.cache.move_to_end(product_url)
+                    return details
+                del self.cache[product_url]
+        if self.store is not None:
+            try:
+                entry = self.store.get(product_url)
+            except (sqlite3.Error, ValueError) as e:
+                logger.warning(f"Product details cache read failed for {product_url}: {e}")
+                return None
+            if entry is not None:
+                # Keep the stored fetch time so memory doesn't extend the TTL
+                details, fetched_at = entry
+                self._cache_in_memory(product_url, details, fetched_at)
+                return details
+        return None
+    
+    def _cache_in_memory(self, product_url: str, details: Dict, fetched_at: float = None):
+        with self._cache_lock:
+            self.cache[product_url] = (details, fetched_at or time.time())
+            self.cache.move_to_end(product_url)
+            while len(self.cache) > ENRICH_MEMORY_ITEMS:
+                self.cache.popitem(last=False)
+    
+    def _remember_details(self, product_url: str, details: Dict):
+        """Cache details when the fetch found anything"""
+        # Don't keep empty results - they are usually transient fetch failures
+        # (the scraper returns all-None fields on timeouts), so retry them later
+        if not details or not any(details.values()):
+            return
+        self._cache_in_memory(product_url, details)
+        if self.store is not None:
+            try:
+                self.store.set(product_url, details)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning(f"Product details cache write failed for {product_url}: {e}")
+    
     def enrich_product_selection_data(self, products: List[Dict], use_selenium: bool = False) -> List[Dict]:
         """
         Enrich product selection data with images and descriptions
@@ -162,6 +347,23 @@ class ProductEnricher:
         return enriched_products
 
 
+_shared_enricher = None
+_shared_enricher_lock = threading.Lock()
+
+
+def get_product_enricher() -> ProductEnricher:
+    """
+    Process-wide ProductEnricher, so the details cache and the scraper's
+    pooled HTTP connections are reused across files and requests
+    """
+    global _shared_enricher
+    if _shared_enricher is None:
+        with _shared_enricher_lock:
+            if _shared_enricher is None:
+                _shared_enricher = ProductEnricher()
+    return _shared_enricher
+
+
 def enrich_session_data(session: Dict, use_selenium: bool = False) -> Dict:
     """
     Enrich all uploaded files in a session with product data
@@ -173,10 +375,23 @@ def enrich_session_data(session: Dict, use_selenium: bool = False) -> Dict:
     Returns:
         Updated session dict
     """
-    enricher = ProductEnricher()
+    enricher = get_product_enricher()
     session_id = session.get('session_id', '')
     
     uploaded_files = session.get('uploaded_files', [])
+    data_keys = ('costed_data', 'extracted_data')
+    
+    # Fetch every distinct product URL in the session up front, so products
+    # repeated across files and tables are scraped once and concurrently
+    session_urls = enricher.collect_product_urls(
+        file_info[key]
+        for file_info in uploaded_files
+        for key in data_keys
+        if key in file_info
+    )
+    # Failed fetches aren't cached, so hand the results on rather than have
+    # each enrich_boq_data call below try them again
+    prefetched = enricher.prefetch_product_details(session_urls, use_selenium)
     
     for file_info in uploaded_files:
         # Enrich costed_data if present
@@ -184,7 +399,8 @@ def enrich_session_data(session: Dict, use_selenium: bool = False) -> Dict:
             file_info['costed_data'] = enricher.enrich_boq_data(
                 file_info['costed_data'],
                 session_id,
-                use_selenium
+                use_selenium,
+                prefetched
             )
         
         # Enrich extracted_data if present
@@ -192,7 +408,8 @@ def enrich_session_data(session: Dict, use_selenium: bool = False) -> Dict:
             file_info['extracted_data'] = enricher.enrich_boq_data(
                 file_info['extracted_data'],
                 session_id,
-                use_selenium
+                use_selenium,
+                prefetched
             )
     
     return session
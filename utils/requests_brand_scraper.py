@@ -3,32 +3,396 @@ Brand scraper using requests + BeautifulSoup
 Primary scraping method - no API limits, fast, reliable
 """
 
+import hashlib
+import json
+import os
+import sqlite3
+import zlib
 import requests
-from bs4 import BeautifulSoup
+import soupsieve
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
 import re
 import time
 import logging
+import threading
 import urllib.robotparser
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import chain
+from typing import Dict, List, Optional
 from urllib.parse import urljoin, urlparse
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# libxml2-backed parser for scraped pages when available, else the pure-Python one
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Containers the product page description/price/feature lookups can match;
+# <head>, scripts and other page chrome outside them are skipped while parsing
+PRODUCT_PAGE_STRAINER = SoupStrainer(['div', 'article', 'section', 'p', 'span', 'ul', 'ol', 'table'])
+
+WHITESPACE_RE = re.compile(r'\s+')
+TYPOLOGY_HREF_RE = re.compile(r'/typologies/', re.I)
+PRODUCT_NAME_CLASS_RE = re.compile(r'(name|title|product.*name)', re.I)
+FEATURE_LIST_CLASS_RE = re.compile(r'(feature|spec|benefit|specification)', re.I)
+SPEC_TABLE_CLASS_RE = re.compile(r'(spec|feature|detail)', re.I)
+PRODUCT_CONTAINER_CLASS_RE = re.compile(r'product|item|card', re.I)
+
+# (tag, attrs) find_all() specs for navigation menus and category cards on a homepage
+NAV_PATTERNS = (
+    ('nav', {}),
+    ('nav', {'class': re.compile(r'menu|nav|category|header', re.I)}),
+    ('ul', {'class': re.compile(r'menu|nav|category', re.I)}),
+    ('div', {'class': re.compile(r'menu|nav|navigation|header-menu', re.I)}),
+    ('header', {}),
+)
+CATEGORY_CARD_PATTERNS = (
+    ('div', {'class': re.compile(r'category|collection|product-cat', re.I)}),
+    ('article', {'class': re.compile(r'category', re.I)}),
+)
+
+# Navigation link texts that are never categories
+NAV_SKIP_TEXTS = frozenset([
+    'home', 'about', 'contact', 'blog', 'news', 'login', 'register',
+    'cart', 'checkout', 'account', 'search', 'menu', 'close', 'more',
+    'view all', 'see all', 'all products', 'shop', 'store', 'back',
+    'reserved area', 'download', 'projects', 'designer', 'company', 'history',
+    'environment', 'certifications', 'showroom', 'whistleblowing', 'find out more',
+    'share by', 'share', 'mail', 'email',
+])
+CATEGORY_URL_INDICATORS = ('/products/', '/product/', '/category/', '/categories/',
+                           '/catalog/', '/collections/', '/collection/')
+PRODUCT_URL_INDICATORS = ('/product/', '/item/', '/p/', '/detail/')
+CATEGORY_URL_KEYWORDS = ('furniture', 'seating', 'chair', 'desk', 'table', 'sofa',
+                         'storage', 'office', 'wall', 'accessory')
+
+
+def _compile_selectors(selectors) -> tuple:
+    """Compile CSS selector strings once at import; (name, attrs) find() specs pass through"""
+    return tuple(soupsieve.compile(sel) if isinstance(sel, str) else sel for sel in selectors)
+
+
+# Product links on listing pages - multiple patterns for different website structures
+PRODUCT_LINK_SELECTORS = _compile_selectors((
+    # WooCommerce patterns
+    'a.woocommerce-LoopProduct-link',
+    'a.product-link',
+    'h2.woocommerce-loop-product__title a',
+    'a[href*="/product/"]',
+    # Generic product patterns
+    'article.product a',
+    'div.product-item a',
+    'div.product-card a',
+    'li.product a',
+    'a[href*="/item/"]',
+    'a[href*="/detail/"]',
+    # LAS.it and similar patterns
+    'a[href*="/products/"]',
+    'div.product a',
+    'article a[href*="/product"]',
+))
+# Link texts (substrings) that mark navigation/action links rather than products
+NON_PRODUCT_NAME_RE = re.compile('|'.join(map(re.escape, [
+    'add to', 'cart', 'wishlist', 'home', 'showing', 'filter', 'sort', 'categories',
+    'read more', 'view', 'learn more', 'find out more', 'share', 'whistleblowing',
+    'mail', 'email', 'download',
+])))
+
+# Product page description/price lookups, in priority order. Plain tag+class/id
+# lookups are (name, attrs) find() specs; CSS selectors only where descendants matter
+DESCRIPTION_SELECTORS = _compile_selectors((
+    ('div', {'class': 'woocommerce-product-details__short-description'}),
+    ('div', {'class': 'product-short-description'}),
+    ('div', {'itemprop': 'description'}),
+    'div.entry-summary p',
+    'div.summary p',
+    # LAS.it specific patterns
+    ('div', {'class': 'entry-content'}),
+    ('div', {'class': 'product-content'}),
+    'div.content p',
+    'article p',
+    ('section', {'class': 'product-description'}),
+    ('div', {'class': 'description'}),
+    ('div', {'class': 'product-description'}),
+))
+# WooCommerce full description tab panel
+FULL_DESCRIPTION_SELECTORS = (
+    ('div', {'id': 'tab-description'}),
+    ('div', {'class': 'woocommerce-Tabs-panel--description'}),
+)
+PRICE_SELECTORS = _compile_selectors((
+    'p.price span.amount',
+    ('span', {'class': 'woocommerce-Price-amount'}),
+    ('span', {'class': 'price-amount'}),
+))
+LOGO_SELECTORS = _compile_selectors((
+    '.custom-logo', '.site-logo img', '.logo img', 'a.logo img',
+    'header img[src*="logo"]', '.navbar-brand img', '[class*="logo"] img',
+    'img[alt*="logo" i]', 'img[class*="logo" i]',
+    '#logo img', '.header-logo img',
+))
+# Boilerplate removed from scraped descriptions
+DESCRIPTION_NOISE_RE = re.compile(r'add to cart|add to wishlist|share:|sku:|categories:|tags:', re.IGNORECASE)
+
+# Markers of client-side rendered sites, matched against the lowercased page bytes
+JS_FRAMEWORK_INDICATORS = (
+    b'react', b'vue', b'angular', b'next.js', b'nuxt',
+    b'data-react', b'data-vue', b'ng-', b'v-bind',
+    b'application/json', b'window.__initial_state__',
+)
+
+
+def _select_first(soup: BeautifulSoup, selector):
+    """First element matching a compiled CSS selector or a (name, attrs) find() spec"""
+    if isinstance(selector, tuple):
+        name, attrs = selector
+        return soup.find(name, attrs)
+    return selector.select_one(soup)
+
+
+@dataclass(slots=True)
+class Product:
+    """A scraped product; converted to a plain dict when a listing is returned"""
+    name: str
+    description: str = ''
+    image_url: Optional[str] = None
+    source_url: str = ''
+    brand: str = 'Unknown'
+    price: Optional[float] = None
+    price_range: str = 'Contact for price'
+    features: List[str] = field(default_factory=list)
+    specifications: Dict = field(default_factory=dict)
+    category_path: List[str] = field(default_factory=list)
+
+
+def _loads_json(data: bytes):
+    """Parse JSON bytes, using orjson when installed"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def parse_product_page(content: bytes) -> Dict:
+    """
+    Extract description, price text and features from a product page's HTML
+    
+    Returns dict: {'description': str, 'price_range': str or None, 'features': [str]}
+    """
+    soup = BeautifulSoup(content, HTML_PARSER, parse_only=PRODUCT_PAGE_STRAINER)
+    
+    # Extract description - common WooCommerce patterns
+    description = ''
+    
+    # Method 1: Full description tab panel (OTTIMO and other WooCommerce sites) -
+    # read directly rather than slicing the text of the whole tabs wrapper
+    for selector in FULL_DESCRIPTION_SELECTORS:
+        desc_elem = _select_first(soup, selector)
+        if desc_elem:
+            for tag in desc_elem.find_all(['script', 'style']):
+                tag.decompose()
+            # The panel repeats its tab title as a heading
+            heading = desc_elem.find(['h2', 'h3'])
+            if heading and heading.get_text(strip=True).lower() == 'description':
+                heading.decompose()
+            description = desc_elem.get_text(separator=' ', strip=True)[:1000]
+            break
+    
+    # Method 2: Try various description selectors
+    if not description:
+        for selector in DESCRIPTION_SELECTORS:
+            desc_elem = _select_first(soup, selector)
+            if desc_elem:
+                # Remove script and style tags
+                for tag in desc_elem.find_all(['script', 'style', 'nav', 'header', 'footer']):
+                    tag.decompose()
+                description = desc_elem.get_text(separator=' ', strip=True)
+                if description and len(description) > 20:
+                    break
+    
+    # Clean up description
+    if description:
+        description = WHITESPACE_RE.sub(' ', description).strip()
+        # Remove common unwanted text
+        description = DESCRIPTION_NOISE_RE.sub('', description).strip()
+    
+    # Try to extract price if available
+    price_range = None
+    for selector in PRICE_SELECTORS:
+        price_elem = _select_first(soup, selector)
+        if price_elem:
+            price_range = price_elem.get_text(strip=True)
+            break
+    
+    return {
+        'description': description,
+        'price_range': price_range,
+        # Extract product features/specifications
+        'features': _extract_product_features(soup),
+    }
+
+
+def _extract_product_features(soup: BeautifulSoup) -> List[str]:
+    """Extract product features/specifications from product page"""
+    features = []
+    
+    try:
+        # Look for feature lists
+        feature_lists = soup.find_all(['ul', 'ol'], class_=FEATURE_LIST_CLASS_RE)
+        
+        for feature_list in feature_lists[:2]:  # Limit to 2 lists
+            for item in feature_list.find_all('li')[:10]:  # Max 10 features per list
+                text = item.get_text(strip=True)
+                if text and len(text) < 200:  # Reasonable feature length
+                    features.append(text)
+        
+        # Also look for specification tables
+        spec_tables = soup.find_all('table', class_=SPEC_TABLE_CLASS_RE)
+        for table in spec_tables[:1]:  # Limit to 1 table
+            rows = table.find_all('tr')[:10]  # Max 10 rows
+            for row in rows:
+                cells = row.find_all(['td', 'th'])
+                if len(cells) >= 2:
+                    # Format as "Key: Value"
+                    key = cells[0].get_text(strip=True)
+                    value = cells[1].get_text(strip=True)
+                    if key and value and len(key) < 50 and len(value) < 100:
+                        features.append(f"{key}: {value}")
+    
+    except Exception as e:
+        logger.debug(f"Error extracting features: {e}")
+    
+    return features[:15]  # Limit total features to 15
+
+
+# Concurrent page fetches: categories are scraped in parallel, and so are the
+# product pages found on each listing page
+SCRAPE_WORKERS = 8
+
+# Pages larger than this are refused (by Content-Length) or cut off while reading
+MAX_PAGE_BYTES = 3_000_000
+
+# Fetched pages persisted across scrapes/restarts, so re-scraping a site within
+# the TTL reads its pages from disk instead of the network
+PAGE_CACHE_PATH = os.path.join('outputs', '.scraper_pages.sqlite3')
+PAGE_CACHE_TTL = 24 * 3600  # seconds
+# Expired pages are deleted on open and at most this often while writing
+PAGE_CACHE_PRUNE_INTERVAL = 3600  # seconds
+
+class PageCache:
+    """SQLite-backed store of fetched page bodies, keyed by URL hash, with a TTL"""
+    
+    def __init__(self, path: str = PAGE_CACHE_PATH, ttl: int = PAGE_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS pages '
+                '(url_hash BLOB PRIMARY KEY, body BLOB NOT NULL, fetched_at REAL NOT NULL)'
+            )
+        self.prune()
+    
+    @staticmethod
+    def _key(url: str) -> bytes:
+        return hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+    
+    def get(self, url: str) -> Optional[bytes]:
+        """Stored body for url, or None when missing or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT body, fetched_at FROM pages WHERE url_hash = ?', (self._key(url),)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return zlib.decompress(row[0])
+    
+    def set(self, url: str, body: bytes):
+        compressed = zlib.compress(body, 1)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO pages (url_hash, body, fetched_at) VALUES (?, ?, ?)',
+                (self._key(url), compressed, time.time())
+            )
+        if time.time() - self._pruned_at > PAGE_CACHE_PRUNE_INTERVAL:
+            self.prune()
+    
+    def prune(self):
+        """Delete expired pages"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM pages WHERE fetched_at < ?', (now - self.ttl,))
+        self._pruned_at = now
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing `rate` requests per second to each host"""
+    
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}  # host -> (tokens, last refill time)
+    
+    def acquire(self, url: str):
+        """Block until a request to url's host is allowed"""
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            # Take the token now (going negative reserves a future slot) so
+            # concurrent callers queue up behind each other
+            self._buckets[host] = (tokens - 1, now)
+        if tokens < 1:
+            time.sleep((1 - tokens) / self.rate)
 
 class RequestsBrandScraper:
     """
     Brand scraper using requests and BeautifulSoup
     """
     
-    def __init__(self, delay: float = 1.0, fetch_descriptions: bool = True):
+    def __init__(self, delay: float = 1.0, fetch_descriptions: bool = True,
+                 cache_path: Optional[str] = PAGE_CACHE_PATH, refresh_cache: bool = False):
         """
         Initialize scraper
         
         Args:
-            delay: Delay between requests in seconds (be polite)
+            delay: Delay between requests to the same host in seconds (be polite)
             fetch_descriptions: If True, visits each product page to get full description
+            cache_path: SQLite file for the on-disk page cache (None disables it)
+            refresh_cache: If True, fetch every page from the network (still updating the cache)
         """
         self.delay = delay
+        # Pacing is shared by all worker threads: at most SCRAPE_WORKERS requests
+        # in flight, and one request per `delay` seconds to any one host - half
+        # that for product pages, which are fetched after all listings
+        self._semaphore = threading.BoundedSemaphore(SCRAPE_WORKERS)
+        self._limiter = RateLimiter(1 / delay) if delay > 0 else None
+        self._product_limiter = RateLimiter(2 / delay) if delay > 0 else None
+        # Scraping still works without the page cache
+        self.page_cache = None
+        self.refresh_cache = refresh_cache
+        if cache_path:
+            try:
+                self.page_cache = PageCache(cache_path)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Scraper page cache unavailable at {cache_path}: {e}")
         self.fetch_descriptions = fetch_descriptions
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -44,6 +408,73 @@ class RequestsBrandScraper:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        # One keep-alive connection per concurrent fetch, kept across all of a
+        # site's listing and product pages; connection failures are retried
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=SCRAPE_WORKERS,
+            max_retries=Retry(total=3, backoff_factor=0.3)
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def _fetch(self, url: str, timeout: float = 15, product_page: bool = False) -> bytes:
+        """
+        GET url within the scraper's concurrency and rate limits and return the body
+        
+        Product pages are paced at twice the rate of other pages (half the delay).
+        Raises for HTTP errors and for bodies announced as over MAX_PAGE_BYTES;
+        bodies that turn out larger while streaming are truncated at the cap
+        (and not cached). Pages in the on-disk cache skip the network (and the rate limit) entirely.
+        """
+        cached = self._cached_page(url)
+        if cached is not None:
+            return cached
+        
+        limiter = self._product_limiter if product_page else self._limiter
+        with self._semaphore:
+            if limiter is not None:
+                limiter.acquire(url)
+            with self.session.get(url, timeout=timeout, stream=True) as response:
+                response.raise_for_status()
+                
+                content_length = response.headers.get('Content-Length', '')
+                if content_length.isdigit() and int(content_length) > MAX_PAGE_BYTES:
+                    raise ValueError(f"Page too large ({content_length} bytes): {url}")
+                
+                chunks = []
+                size = 0
+                truncated = False
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size > MAX_PAGE_BYTES:
+                        logger.warning(f"Truncating page at {MAX_PAGE_BYTES} bytes: {url}")
+                        truncated = True
+                        break
+        
+        content = b''.join(chunks)[:MAX_PAGE_BYTES]
+        # A cut-off page is usable once, but must not be served later as complete
+        if not truncated:
+            self._remember_page(url, content)
+        return content
+    
+    def _cached_page(self, url: str) -> Optional[bytes]:
+        if self.page_cache is None or self.refresh_cache:
+            return None
+        try:
+            return self.page_cache.get(url)
+        except (sqlite3.Error, zlib.error) as e:
+            logger.warning(f"Scraper page cache read failed for {url}: {e}")
+            return None
+    
+    def _remember_page(self, url: str, content: bytes):
+        if self.page_cache is None:
+            return
+        try:
+            self.page_cache.set(url, content)
+        except sqlite3.Error as e:
+            logger.warning(f"Scraper page cache write failed for {url}: {e}")
     
     def check_robots_allowed(self, website: str) -> bool:
         """Check if scraping is allowed by robots.txt"""
@@ -78,16 +509,15 @@ class RequestsBrandScraper:
             if not self.check_robots_allowed(website):
                 logger.warning(f"⚠️  Scraping not allowed by robots.txt for {website}, continuing anyway")
             
+            # Get main page once - it is both checked for JavaScript and searched for categories
+            content = self._fetch(website)
+            soup = BeautifulSoup(content, HTML_PARSER)
+            
             # First, check if the site requires JavaScript
-            js_required = self._detect_javascript_required(website)
+            js_required = self._detect_javascript_required(content, soup)
             if js_required:
                 logger.warning(f"⚠️  Site appears to require JavaScript. Consider using Selenium scraper for better results.")
                 # Continue anyway, but log the warning
-            # Get main page to find categories
-            response = self.session.get(website, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
             
             # Find category links
             categories = self._find_categories(soup, website)
@@ -96,7 +526,7 @@ class RequestsBrandScraper:
             # Special handling for LAS.it and similar sites with typologies
             # If we're on /products/ page, look for typology links on that page
             if '/products' in website.lower() or '/product' in website.lower():
-                typology_links = soup.find_all('a', href=re.compile(r'/typologies/', re.I))
+                typology_links = soup.find_all('a', href=TYPOLOGY_HREF_RE)
                 if typology_links:
                     logger.info(f"Found {len(typology_links)} typology links on products page")
                     for link in typology_links:
@@ -136,6 +566,7 @@ class RequestsBrandScraper:
                             }
                         }
                     }
+                    self._finish_category_tree(category_tree)
                     return {
                         'success': True,
                         'brand': brand_name,
@@ -146,42 +577,21 @@ class RequestsBrandScraper:
                         'categories_found': 1
                     }
             
-            # Scrape each category
-            all_products = {}
+            # Scrape categories concurrently; map() keeps the site's category order
             category_tree = {}
             
-            for category_name, category_url in categories.items():
-                logger.info(f"Scraping category: {category_name}")
-                
-                # Get subcategories
-                subcategories = self._find_subcategories(category_url, category_name)
-                
-                if subcategories:
-                    # Has subcategories
-                    category_tree[category_name] = {'subcategories': {}}
-                    
-                    for subcat_name, subcat_url in subcategories.items():
-                        logger.info(f"  Scraping subcategory: {subcat_name}")
-                        products = self._scrape_product_list(subcat_url, category_name, subcat_name, limit)
-                        
-                        if products:
-                            category_tree[category_name]['subcategories'][subcat_name] = {
-                                'products': products
-                            }
-                        
-                        time.sleep(self.delay)
-                else:
-                    # No subcategories, scrape category directly
-                    products = self._scrape_product_list(category_url, category_name, 'General', limit)
-                    
-                    if products:
-                        category_tree[category_name] = {
-                            'subcategories': {
-                                'General': {'products': products}
-                            }
-                        }
-                
-                time.sleep(self.delay)
+            with ThreadPoolExecutor(max_workers=max(1, min(SCRAPE_WORKERS, len(categories)))) as executor:
+                category_entries = list(executor.map(
+                    lambda item: self._scrape_category(item[0], item[1], limit),
+                    categories.items()
+                ))
+            
+            for category_name, entry in zip(categories, category_entries):
+                if entry is not None:
+                    category_tree[category_name] = entry
+            
+            # Second pass: visit every product page found above as one batch
+            self._finish_category_tree(category_tree)
             
             total_products = sum(
                 len(sub.get('products', []))
@@ -210,29 +620,68 @@ class RequestsBrandScraper:
                 'error': str(e)
             }
     
+    def _finish_category_tree(self, category_tree: Dict):
+        """
+        Fetch product details for every product in the tree in one concurrent
+        batch (if enabled), then replace the Product records with plain dicts
+        """
+        product_lists = [
+            sub['products']
+            for cat in category_tree.values()
+            for sub in cat.get('subcategories', {}).values()
+        ]
+        
+        if self.fetch_descriptions:
+            # Products already described by listing JSON-LD are skipped
+            all_products = [product for products in product_lists for product in products if not product.description]
+            if all_products:
+                self._enrich_products(all_products)
+        
+        for products in product_lists:
+            products[:] = [asdict(product) for product in products]
+    
+    def _scrape_category(self, category_name: str, category_url: str, limit: int) -> Optional[Dict]:
+        """Scrape one category into its category_tree entry (None if it has no products)"""
+        logger.info(f"Scraping category: {category_name}")
+        entry = None
+        
+        # Get subcategories
+        subcategories = self._find_subcategories(category_url, category_name)
+        
+        if subcategories:
+            # Has subcategories
+            entry = {'subcategories': {}}
+            
+            for subcat_name, subcat_url in subcategories.items():
+                logger.info(f"  Scraping subcategory: {subcat_name}")
+                products = self._scrape_product_list(subcat_url, category_name, subcat_name, limit)
+                
+                if products:
+                    entry['subcategories'][subcat_name] = {
+                        'products': products
+                    }
+        else:
+            # No subcategories, scrape category directly
+            products = self._scrape_product_list(category_url, category_name, 'General', limit)
+            
+            if products:
+                entry = {
+                    'subcategories': {
+                        'General': {'products': products}
+                    }
+                }
+        
+        return entry
+    
     def _find_categories(self, soup: BeautifulSoup, base_url: str) -> Dict[str, str]:
         """Find main product categories from homepage - dynamically detects various website structures"""
         categories = {}
         seen_urls = set()
         
-        # Skip common non-category navigation items
-        skip_texts = ['home', 'about', 'contact', 'blog', 'news', 'login', 'register', 
-                     'cart', 'checkout', 'account', 'search', 'menu', 'close', 'more',
-                     'view all', 'see all', 'all products', 'shop', 'store', 'back',
-                     'reserved area', 'download', 'projects', 'designer', 'company', 'history',
-                     'environment', 'certifications', 'showroom', 'whistleblowing', 'find out more',
-                     'share by', 'share', 'mail', 'email']
-        
         # Strategy 1: Look for navigation menus with common patterns
-        nav_patterns = [
-            ('nav', {}),
-            ('nav', {'class': lambda x: x and any(c in str(x).lower() for c in ['menu', 'nav', 'category', 'header'])}),
-            ('ul', {'class': lambda x: x and any(c in str(x).lower() for c in ['menu', 'nav', 'category'])}),
-            ('div', {'class': lambda x: x and any(c in str(x).lower() for c in ['menu', 'nav', 'navigation', 'header-menu'])}),
-            ('header', {}),
-        ]
+        parsed_base = urlparse(base_url)
         
-        for tag, attrs in nav_patterns:
+        for tag, attrs in NAV_PATTERNS:
             nav_elements = soup.find_all(tag, attrs) if attrs else soup.find_all(tag)
             
             for nav in nav_elements:
@@ -246,7 +695,7 @@ class RequestsBrandScraper:
                         continue
                     
                     # Skip common non-category items
-                    if text.lower() in skip_texts:
+                    if text.lower() in NAV_SKIP_TEXTS:
                         continue
                     
                     # Build full URL
@@ -257,13 +706,13 @@ class RequestsBrandScraper:
                         continue
                     
                     # Skip external links
-                    parsed_base = urlparse(base_url)
                     parsed_link = urlparse(full_url)
                     if parsed_link.netloc and parsed_link.netloc != parsed_base.netloc:
                         continue
                     
                     # Detect category URLs - multiple patterns
                     url_path = parsed_link.path.lower()
+                    path_depth = len([p for p in url_path.split('/') if p])
                     
                     # Pattern 1: WooCommerce (/product-category/)
                     if '/product-category/' in url_path:
@@ -274,20 +723,15 @@ class RequestsBrandScraper:
                             continue
                     
                     # Pattern 2: Generic product/category patterns
-                    category_indicators = ['/products/', '/product/', '/category/', '/categories/', 
-                                        '/catalog/', '/collections/', '/collection/']
-                    product_indicators = ['/product/', '/item/', '/p/', '/detail/']
-                    
                     # Check if it's a category page (not a specific product)
-                    is_category = any(ind in url_path for ind in category_indicators)
+                    is_category = any(ind in url_path for ind in CATEGORY_URL_INDICATORS)
                     is_product = any(ind in url_path and '/product/' not in url_path.replace(ind, '')[:20] 
-                                   for ind in product_indicators)
+                                   for ind in PRODUCT_URL_INDICATORS)
                     
                     # Pattern 3: LAS.it style - links in navigation that go to /en/products/ or similar
                     if '/products' in url_path or '/product' in url_path:
                         # Check if it's a category listing page (not a specific product)
                         # Products usually have longer paths or IDs
-                        path_depth = len([p for p in url_path.split('/') if p])
                         if path_depth <= 3:  # Shallow path = likely category
                             seen_urls.add(full_url)
                             categories[text] = full_url
@@ -307,9 +751,7 @@ class RequestsBrandScraper:
                         continue
                     
                     # Pattern 5: Check if URL contains category-like keywords
-                    category_keywords = ['furniture', 'seating', 'chair', 'desk', 'table', 'sofa', 
-                                       'storage', 'office', 'wall', 'accessory']
-                    if any(kw in url_path for kw in category_keywords) and path_depth <= 3:
+                    if any(kw in url_path for kw in CATEGORY_URL_KEYWORDS) and path_depth <= 3:
                         seen_urls.add(full_url)
                         categories[text] = full_url
                         continue
@@ -326,7 +768,7 @@ class RequestsBrandScraper:
                 if not href or not text or len(text) < 2:
                     continue
                 
-                if text.lower() in skip_texts:
+                if text.lower() in NAV_SKIP_TEXTS:
                     continue
                 
                 full_url = urljoin(base_url, href)
@@ -338,7 +780,7 @@ class RequestsBrandScraper:
                 url_path = parsed_link.path.lower()
                 
                 # Check if it's a category-style link
-                if any(ind in url_path for ind in category_indicators) or '/products' in url_path:
+                if any(ind in url_path for ind in CATEGORY_URL_INDICATORS) or '/products' in url_path:
                     # Make sure it's not too deep (products are usually deeper)
                     path_depth = len([p for p in url_path.split('/') if p])
                     if path_depth <= 4 and text not in categories:
@@ -346,12 +788,7 @@ class RequestsBrandScraper:
                         categories[text] = full_url
         
         # Strategy 3: Look for category cards/sections on homepage
-        category_card_patterns = [
-            ('div', {'class': lambda x: x and any(c in str(x).lower() for c in ['category', 'collection', 'product-cat'])}),
-            ('article', {'class': lambda x: x and 'category' in str(x).lower()}),
-        ]
-        
-        for tag, attrs in category_card_patterns:
+        for tag, attrs in CATEGORY_CARD_PATTERNS:
             cards = soup.find_all(tag, attrs)
             for card in cards:
                 link = card.find('a', href=True)
@@ -362,7 +799,7 @@ class RequestsBrandScraper:
                     if not href or not text or len(text) < 2:
                         continue
                     
-                    if text.lower() in skip_texts:
+                    if text.lower() in NAV_SKIP_TEXTS:
                         continue
                     
                     full_url = urljoin(base_url, href)
@@ -378,14 +815,11 @@ class RequestsBrandScraper:
         subcategories = {}
         
         try:
-            response = self.session.get(category_url, timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = BeautifulSoup(self._fetch(category_url), HTML_PARSER)
             
             # Check if page requires JavaScript (has many containers but few links)
             product_containers = soup.find_all(['div', 'article', 'li'], 
-                                             class_=lambda x: x and any(c in str(x).lower() for c in ['product', 'item', 'card']))
+                                             class_=PRODUCT_CONTAINER_CLASS_RE)
             all_links = soup.find_all('a', href=True)
             product_links = [link for link in all_links 
                            if any(p in link.get('href', '').lower() for p in ['/product/', '/item/']) 
@@ -425,11 +859,20 @@ class RequestsBrandScraper:
             logger.warning(f"Error finding subcategories for {category_name}: {e}")
             return {}
     
-    def _scrape_product_list(self, url: str, category: str, subcategory: str, limit: int) -> List[Dict]:
-        """Scrape products from a category/subcategory page with pagination support"""
+    def _scrape_product_list(self, url: str, category: str, subcategory: str, limit: int) -> List[Product]:
+        """
+        Scrape products from a category/subcategory page with pagination support
+        
+        Only the listing pages are fetched here; product pages are visited
+        afterwards for the whole site at once (see _finish_category_tree)
+        """
         products = []
         page = 1
         seen_urls = set()
+        # Shared by every product of this listing rather than rebuilt per product
+        brand = category.split()[0] if category else 'Unknown'
+        parsed_url = urlparse(url)
+        base_prefix = f"{parsed_url.scheme}://{parsed_url.netloc}"
         
         while len(products) < limit:
             try:
@@ -442,76 +885,23 @@ class RequestsBrandScraper:
                         page_url = f"{url}?paged={page}" if not url.endswith('/') else f"{url}page/{page}/"
                 
                 logger.info(f"Scraping page {page}: {page_url}")
-                response = self.session.get(page_url, timeout=15)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
+                soup = BeautifulSoup(self._fetch(page_url), HTML_PARSER)
                 
-                # Find product links - multiple patterns for different website structures
-                product_selectors = [
-                    # WooCommerce patterns
-                    'a.woocommerce-LoopProduct-link',
-                    'a.product-link',
-                    'h2.woocommerce-loop-product__title a',
-                    'a[href*="/product/"]',
-                    # Generic product patterns
-                    'article.product a',
-                    'div.product-item a',
-                    'div.product-card a',
-                    'li.product a',
-                    'a[href*="/item/"]',
-                    'a[href*="/detail/"]',
-                    # LAS.it and similar patterns
-                    'a[href*="/products/"]',
-                    'div.product a',
-                    'article a[href*="/product"]',
-                ]
-                
-                product_links = []
-                for selector in product_selectors:
-                    try:
-                        found = soup.select(selector)
-                        if found:
-                            product_links.extend(found)
-                            logger.debug(f"Found {len(found)} products using selector: {selector}")
-                    except Exception as e:
-                        logger.debug(f"Selector {selector} failed: {e}")
-                        continue
-                
-                # Fallback: find all links that look like product pages
-                if not product_links:
-                    all_links = soup.find_all('a', href=True)
-                    for link in all_links:
-                        href = link.get('href', '')
-                        
-                        # Skip non-http links
-                        if href.startswith('mailto:') or href.startswith('tel:') or href.startswith('javascript:'):
-                            continue
-                        
-                        # Look for product-like URLs but exclude category URLs
-                        if any(pattern in href.lower() for pattern in ['/product/', '/item/', '/detail/', '/p/']):
-                            if '/product-category/' not in href.lower() and '/category/' not in href.lower() and '/typologies/' not in href.lower():
-                                product_links.append(link)
-                        # Also check for products in /products/ path (LAS.it style)
-                        elif '/products/' in href.lower():
-                            # Make sure it's not just the category page and not a typology
-                            path_parts = [p for p in href.split('/') if p]
-                            if len(path_parts) > 3 and '/typologies/' not in href.lower():  # Deeper path = likely a product
-                                product_links.append(link)
-                        # LAS.it specific: products might be in /typologies/[category]/[product]/
-                        elif '/typologies/' in href.lower():
-                            path_parts = [p for p in href.split('/') if p]
-                            # If it has more than typologies/category, it's likely a product
-                            typology_index = [i for i, p in enumerate(path_parts) if 'typologies' in p.lower()]
-                            if typology_index and len(path_parts) > typology_index[0] + 2:
-                                product_links.append(link)
+                # Find product links lazily - selectors are only evaluated until
+                # the page yields enough products to reach the limit
+                product_links = self._iter_product_links(soup)
+                first_link = next(product_links, None)
+                if first_link is not None:
+                    product_links = chain((first_link,), product_links)
+                else:
+                    product_links = []
                 
                 # If no product links found, try to extract from containers
                 if not product_links:
                     logger.info(f"No product links found, trying to extract from containers...")
                     # Look for product containers that might have product info
                     containers = soup.find_all(['div', 'article', 'li'], 
-                                              class_=lambda x: x and any(c in str(x).lower() for c in ['product', 'item', 'card']))
+                                              class_=PRODUCT_CONTAINER_CLASS_RE)
                     
                     for container in containers[:limit]:
                         # Try to find any link in container
@@ -535,6 +925,8 @@ class RequestsBrandScraper:
                     break
                 
                 page_products_count = 0
+                # Product data some sites (e.g. WooCommerce) embed in the listing itself
+                listed_details = self._extract_json_ld_products(soup, page_url)
                 
                 for link in product_links:
                     if len(products) >= limit:
@@ -546,8 +938,7 @@ class RequestsBrandScraper:
                     
                     # Make absolute URL
                     if product_url.startswith('/'):
-                        parsed = urlparse(url)
-                        product_url = f"{parsed.scheme}://{parsed.netloc}{product_url}"
+                        product_url = base_prefix + product_url
                     
                     # Skip if already seen
                     if product_url in seen_urls:
@@ -576,7 +967,7 @@ class RequestsBrandScraper:
                                 product_name = heading.get_text(strip=True)
                             # Look for product name class
                             if not product_name:
-                                name_elem = parent.find(['span', 'div'], class_=re.compile(r'(name|title|product.*name)', re.I))
+                                name_elem = parent.find(['span', 'div'], class_=PRODUCT_NAME_CLASS_RE)
                                 if name_elem:
                                     product_name = name_elem.get_text(strip=True)
                     
@@ -591,17 +982,14 @@ class RequestsBrandScraper:
                     
                     # Clean product name
                     if product_name:
-                        product_name = re.sub(r'\s+', ' ', product_name).strip()
+                        product_name = WHITESPACE_RE.sub(' ', product_name).strip()
                     
                     # Skip if still no valid name
                     if not product_name or len(product_name) < 3:
                         continue
                     
                     # Skip navigation items
-                    if any(skip in product_name.lower() for skip in ['add to', 'cart', 'wishlist', 'home', 'showing', 
-                                                                     'filter', 'sort', 'categories', 'read more', 
-                                                                     'view', 'learn more', 'find out more', 'share',
-                                                                     'whistleblowing', 'mail', 'email', 'download']):
+                    if NON_PRODUCT_NAME_RE.search(product_name.lower()):
                         continue
                     
                     # Skip mailto: and other non-http links
@@ -612,25 +1000,28 @@ class RequestsBrandScraper:
                     img = link.find('img')
                     image_url = None
                     if img:
-                        image_url = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
+                        # Plain src, or the usual lazy-loading attributes
+                        attrs = img.attrs
+                        image_url = (attrs.get('src') or attrs.get('data-src')
+                                     or attrs.get('data-lazy-src') or attrs.get('data-original'))
                     
                     # Create product entry
-                    product = {
-                        'name': product_name,
-                        'description': '',
-                        'image_url': image_url,
-                        'source_url': product_url,
-                        'brand': category.split()[0] if category else 'Unknown',
-                        'price': None,
-                        'price_range': 'Contact for price',
-                        'features': [],
-                        'specifications': {},
-                        'category_path': [category, subcategory]
-                    }
+                    product = Product(
+                        name=product_name,
+                        source_url=product_url,
+                        image_url=image_url,
+                        brand=brand,
+                        category_path=[category, subcategory]
+                    )
                     
-                    # Fetch detailed product info if enabled
-                    if self.fetch_descriptions:
-                        self._enrich_product_details(product)
+                    # Fill in from the listing's JSON-LD; products it describes
+                    # don't need their own page visited
+                    listed = listed_details.get(product_url)
+                    if listed:
+                        product.description = listed['description']
+                        product.image_url = product.image_url or listed['image_url']
+                        if listed['price_range']:
+                            product.price_range = listed['price_range']
                     
                     products.append(product)
                     page_products_count += 1
@@ -642,7 +1033,6 @@ class RequestsBrandScraper:
                     break
                 
                 page += 1
-                time.sleep(self.delay)
                 
             except Exception as e:
                 logger.error(f"Error scraping page {page} from {url}: {e}")
@@ -650,143 +1040,137 @@ class RequestsBrandScraper:
         
         return products
     
-    def _enrich_product_details(self, product: Dict):
-        """Visit individual product page to get full description and details"""
-        try:
-            response = self.session.get(product['source_url'], timeout=15)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract description - common WooCommerce patterns
-            description = ''
-            
-            # Method 1: Try WC tabs wrapper (OTTIMO uses this)
-            tabs_wrapper = soup.find('div', class_='wc-tabs-wrapper')
-            if tabs_wrapper:
-                text = tabs_wrapper.get_text(strip=True)
-                # Extract description between "Description" and "Additional"
-                if 'Description' in text:
-                    desc_start = text.find('Description') + len('Description')
-                    desc_end = text.find('Additional', desc_start)
-                    if desc_end > desc_start:
-                        description = text[desc_start:desc_end].strip()
-                    else:
-                        description = text[desc_start:desc_start+500].strip()
+    def _extract_json_ld_products(self, soup: BeautifulSoup, base_url: str) -> Dict[str, Dict]:
+        """
+        Product details embedded as JSON-LD (schema.org Product) in a page
+        Returns dict: {product_url: {'description', 'image_url', 'price_range'}}
+        for products that come with a description
+        """
+        products = {}
+        pending = []
+        for script in soup.find_all('script', type='application/ld+json'):
+            try:
+                # bs4 hands back a str subclass, which orjson rejects - pass bytes
+                pending.append(_loads_json((script.string or '').encode()))
+            except ValueError:
+                continue
+        
+        # Walk nested @graph / ItemList / ListItem structures for Product objects
+        while pending:
+            node = pending.pop()
+            if isinstance(node, list):
+                pending.extend(node)
+                continue
+            if not isinstance(node, dict):
+                continue
+            pending.extend(value for value in node.values() if isinstance(value, (dict, list)))
             
-            # Method 2: Try various description selectors
+            node_type = node.get('@type')
+            is_product = node_type == 'Product' or (isinstance(node_type, list) and 'Product' in node_type)
+            description = node.get('description')
+            if not is_product or not isinstance(node.get('url'), str) or not isinstance(description, str):
+                continue
+            description = WHITESPACE_RE.sub(' ', description).strip()
             if not description:
-                desc_selectors = [
-                    'div.woocommerce-product-details__short-description',
-                    'div.product-short-description',
-                    'div[itemprop="description"]',
-                    'div.entry-summary p',
-                    'div.summary p',
-                    # LAS.it specific patterns
-                    'div.entry-content',
-                    'div.product-content',
-                    'div.content p',
-                    'article p',
-                    'section.product-description',
-                    'div.description'
-                ]
-                
-                for selector in desc_selectors:
-                    desc_elem = soup.select_one(selector)
-                    if desc_elem:
-                        # Remove script and style tags
-                        for tag in desc_elem.find_all(['script', 'style', 'nav', 'header', 'footer']):
-                            tag.decompose()
-                        description = desc_elem.get_text(separator=' ', strip=True)
-                        if description and len(description) > 20:
-                            break
-            
-            # Method 3: Try full description tab
-            if not description:
-                full_desc_selectors = [
-                    'div#tab-description',
-                    'div.woocommerce-Tabs-panel--description',
-                    'div.product-description'
-                ]
-                
-                for selector in full_desc_selectors:
-                    desc_elem = soup.select_one(selector)
-                    if desc_elem:
-                        # Get text from paragraphs
-                        paragraphs = desc_elem.find_all('p')
-                        if paragraphs:
-                            description = ' '.join(p.get_text(strip=True) for p in paragraphs[:3])
-                        else:
-                            description = desc_elem.get_text(strip=True)[:500]
-                        break
+                continue
             
-            # Clean up description
-            if description:
-                description = re.sub(r'\s+', ' ', description).strip()
-                # Remove common unwanted text
-                unwanted = ['add to cart', 'add to wishlist', 'share:', 'sku:', 'categories:', 'tags:']
-                for unwanted_text in unwanted:
-                    description = re.sub(unwanted_text, '', description, flags=re.IGNORECASE)
-                description = description.strip()
-            
-            product['description'] = description
-            
-            # Try to extract price if available
-            price_selectors = [
-                'p.price span.amount',
-                'span.woocommerce-Price-amount',
-                'span.price-amount'
-            ]
-            
-            for selector in price_selectors:
-                price_elem = soup.select_one(selector)
-                if price_elem:
-                    price_text = price_elem.get_text(strip=True)
-                    product['price_range'] = price_text
-                    break
+            image = node.get('image')
+            if isinstance(image, list):
+                image = image[0] if image else None
+            if isinstance(image, dict):
+                image = image.get('url')
             
-            # Extract product features/specifications
-            features = self._extract_product_features(soup)
-            if features:
-                product['features'] = features
+            offers = node.get('offers')
+            if isinstance(offers, list):
+                offers = offers[0] if offers else None
+            price_range = None
+            if isinstance(offers, dict):
+                price = offers.get('price') or offers.get('lowPrice')
+                if price:
+                    price_range = f"{offers.get('priceCurrency', '')} {price}".strip()
+            
+            products[urljoin(base_url, node['url'])] = {
+                'description': description,
+                'image_url': image if isinstance(image, str) else None,
+                'price_range': price_range,
+            }
+        
+        return products
+    
+    def _iter_product_links(self, soup: BeautifulSoup):
+        """
+        Lazily yield the product links of a listing page
+        
+        Yields the matches of each product link selector in turn; only if none
+        match, falls back to links whose URL looks like a product page
+        """
+        found_any = False
+        for selector in PRODUCT_LINK_SELECTORS:
+            found = selector.select(soup)
+            if found:
+                found_any = True
+                logger.debug(f"Found {len(found)} products using selector: {selector.pattern}")
+                yield from found
+        
+        if found_any:
+            return
+        
+        # Fallback: find all links that look like product pages
+        for link in soup.find_all('a', href=True):
+            href = link.get('href', '')
             
-            time.sleep(self.delay * 0.5)  # Half delay for product pages
+            # Skip non-http links
+            if href.startswith('mailto:') or href.startswith('tel:') or href.startswith('javascript:'):
+                continue
             
-        except Exception as e:
-            logger.warning(f"Could not enrich product {product['name']}: {e}")
-            # Continue without description if fetch fails
+            # Look for product-like URLs but exclude category URLs
+            if any(pattern in href.lower() for pattern in ['/product/', '/item/', '/detail/', '/p/']):
+                if '/product-category/' not in href.lower() and '/category/' not in href.lower() and '/typologies/' not in href.lower():
+                    yield link
+            # Also check for products in /products/ path (LAS.it style)
+            elif '/products/' in href.lower():
+                # Make sure it's not just the category page and not a typology
+                path_parts = [p for p in href.split('/') if p]
+                if len(path_parts) > 3 and '/typologies/' not in href.lower():  # Deeper path = likely a product
+                    yield link
+            # LAS.it specific: products might be in /typologies/[category]/[product]/
+            elif '/typologies/' in href.lower():
+                path_parts = [p for p in href.split('/') if p]
+                # If it has more than typologies/category, it's likely a product
+                typology_index = [i for i, p in enumerate(path_parts) if 'typologies' in p.lower()]
+                if typology_index and len(path_parts) > typology_index[0] + 2:
+                    yield link
     
-    def _extract_product_features(self, soup: BeautifulSoup) -> List[str]:
-        """Extract product features/specifications from product page"""
-        features = []
+    def _enrich_products(self, products: List[Product]):
+        """Visit the product pages of several products concurrently"""
+        # A product listed under several (sub)categories has its page visited once
+        by_url = {}
+        for product in products:
+            by_url.setdefault(product.source_url, []).append(product)
         
-        try:
-            # Look for feature lists
-            feature_lists = soup.find_all(['ul', 'ol'], class_=re.compile(r'(feature|spec|benefit|specification)', re.I))
-            
-            for feature_list in feature_lists[:2]:  # Limit to 2 lists
-                for item in feature_list.find_all('li')[:10]:  # Max 10 features per list
-                    text = item.get_text(strip=True)
-                    if text and len(text) < 200:  # Reasonable feature length
-                        features.append(text)
-            
-            # Also look for specification tables
-            spec_tables = soup.find_all('table', class_=re.compile(r'(spec|feature|detail)', re.I))
-            for table in spec_tables[:1]:  # Limit to 1 table
-                rows = table.find_all('tr')[:10]  # Max 10 rows
-                for row in rows:
-                    cells = row.find_all(['td', 'th'])
-                    if len(cells) >= 2:
-                        # Format as "Key: Value"
-                        key = cells[0].get_text(strip=True)
-                        value = cells[1].get_text(strip=True)
-                        if key and value and len(key) < 50 and len(value) < 100:
-                            features.append(f"{key}: {value}")
+        with ThreadPoolExecutor(max_workers=min(SCRAPE_WORKERS, len(by_url))) as executor:
+            list(executor.map(self._enrich_product_details, [group[0] for group in by_url.values()]))
         
+        for visited, *duplicates in by_url.values():
+            for product in duplicates:
+                product.description = visited.description
+                product.price_range = visited.price_range
+                product.features = list(visited.features)
+    
+    def _enrich_product_details(self, product: Product):
+        """Visit individual product page to get full description and details"""
+        try:
+            details = parse_product_page(self._fetch(product.source_url, product_page=True))
+            
+            product.description = details['description']
+            if details['price_range'] is not None:
+                product.price_range = details['price_range']
+            if details['features']:
+                product.features = details['features']
+            
         except Exception as e:
-            logger.debug(f"Error extracting features: {e}")
-        
-        return features[:15]  # Limit total features to 15
+            logger.warning(f"Could not enrich product {product.name}: {e}")
+            # Continue without description if fetch fails
     
     def _detect_subcategories_on_page(self, soup: BeautifulSoup, base_url: str, parent_category: str) -> Dict[str, str]:
         """
@@ -857,24 +1241,15 @@ class RequestsBrandScraper:
         
         return name.strip()
     
-    def _detect_javascript_required(self, website: str) -> bool:
-        """Detect if website requires JavaScript rendering"""
+    def _detect_javascript_required(self, content: bytes, soup: BeautifulSoup) -> bool:
+        """Detect if a page (raw bytes and parsed tree) requires JavaScript rendering"""
         try:
-            response = self.session.get(website, timeout=10)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Check for common JavaScript framework indicators
-            scripts = soup.find_all('script')
-            js_indicators = [
-                'react', 'vue', 'angular', 'next.js', 'nuxt',
-                'data-react', 'data-vue', 'ng-', 'v-bind',
-                'application/json', 'window.__INITIAL_STATE__'
-            ]
-            
-            page_text = response.text.lower()
-            for indicator in js_indicators:
-                if indicator in page_text:
-                    logger.info(f"Detected JavaScript framework: {indicator}")
+            # Check for common JavaScript framework indicators - on the raw bytes,
+            # so the body is never charset-sniffed and decoded to text
+            page_bytes = content.lower()
+            for indicator in JS_FRAMEWORK_INDICATORS:
+                if indicator in page_bytes:
+                    logger.info(f"Detected JavaScript framework: {indicator.decode()}")
                     return True
             
             # Check if page has minimal content (suggesting JS rendering)
@@ -884,8 +1259,7 @@ class RequestsBrandScraper:
                 return True
             
             # Check for empty product containers (common in JS-rendered sites)
-            product_containers = soup.find_all(['div', 'article', 'li'], 
-                                               class_=re.compile(r'(product|item|card)', re.I))
+            product_containers = soup.find_all(['div', 'article', 'li'], class_=PRODUCT_CONTAINER_CLASS_RE)
             if len(product_containers) > 0:
                 # Check if containers are empty (JS-rendered)
                 empty_count = sum(1 for container in product_containers[:5] 
@@ -911,17 +1285,9 @@ class RequestsBrandScraper:
                     return content if content.startswith('http') else urljoin(base_url, content)
 
             # Priority 1: Common logo selectors
-            logo_selectors = [
-                '.custom-logo', '.site-logo img', '.logo img', 'a.logo img',
-                'header img[src*="logo"]', '.navbar-brand img', '[class*="logo"] img',
-                'img[alt*="logo" i]', 'img[class*="logo" i]',
-                '#logo img', '.header-logo img'
-            ]
-            
-            for selector in logo_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    el = elements[0]
+            for selector in LOGO_SELECTORS:
+                el = selector.select_one(soup)
+                if el:
                     src = el.get('src') or el.get('data-src') or el.get('srcset')
                     if src:
                         logo_url = urljoin(base_url, src.split()[0])
@@ -4,6 +4,7 @@ Combines multiple detection strategies with intelligent fallbacks
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import logging
 import time
@@ -135,6 +136,12 @@ class UniversalBrandScraper:
         }
         self.rate_limit_delay = 1.0
         
+        # Pooled keep-alive session, sized for concurrent product detail fetches
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
         # Enhanced configuration
         self.config = {
             'parallel_collections': False,  # Disabled by default for stability
@@ -193,7 +200,7 @@ class UniversalBrandScraper:
     def _detect_javascript_required(self, website: str) -> bool:
         """Detect if website requires JavaScript"""
         try:
-            response = requests.get(website, headers=self.headers, timeout=10)
+            response = self.session.get(website, headers=self.headers, timeout=10)
             soup = BeautifulSoup(response.content, 'html.parser')
             
             # Check for common JS framework indicators
@@ -210,7 +217,7 @@ class UniversalBrandScraper:
     def _scrape_with_requests(self, website: str, brand_name: str) -> Dict:
         """Scrape using requests - for static sites"""
         try:
-            response = requests.get(website, headers=self.headers, timeout=15)
+            response = self.session.get(website, headers=self.headers, timeout=15)
             soup = BeautifulSoup(response.content, 'html.parser')
             
             brand_logo = self._extract_brand_logo(soup, website)
@@ -979,7 +986,7 @@ class UniversalBrandScraper:
                 finally:
                     scraper.close()
             else:
-                response = requests.get(product_url, headers=self.headers, timeout=10)
+                response = self.session.get(product_url, headers=self.headers, timeout=10)
                 soup = BeautifulSoup(response.content, 'html.parser')
             
             # Extract description
@@ -1378,7 +1385,7 @@ class UniversalBrandScraper:
                 logger.debug(f"Using cached page for {url}")
                 soup = self._page_cache[url]
             else:
-                response = requests.get(url, headers=self.headers, timeout=15)
+                response = self.session.get(url, headers=self.headers, timeout=15)
                 soup = BeautifulSoup(response.content, 'html.parser')
                 if self.config.get('enable_caching'):
                     self._page_cache[url] = soup